@@ -1,15 +1,30 @@
 import os
+import re
+import uuid
 from flask import Flask, request
 from werkzeug.exceptions import NotFound
 from app.routes.api_routes import api_bp
+from app.services.cache_service import CacheService
+from app.services.history_tailer_service import HistoryTailer
+from app.services.logger_service import request_id_var
+from app.services.metrics_service import MetricsService, RequestTimer, instrument_engine
+from app.services.profiler_service import ProfilerService
 from app.utils.api_exceptions import APIError, APIWarn
 from app.utils.api_consts import APIConfig
+from app.utils.api_compression import compress_response
+from app.utils.api_json import FastJSONProvider
+from db.db import AsyncDatabase, Database
 
 api_config = APIConfig()
 
+REQUEST_ID_HEADER = "X-Request-ID"
+# Client supplied ids end up in every log line, anything else is replaced
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.register_blueprint(api_bp, url_prefix="/api")
 
     print(
@@ -21,6 +36,57 @@ PORT:{api_config.port}
 {20 * '-'}"""
     )
 
+    request_timer = RequestTimer(MetricsService())
+    instrument_engine(Database().engine)
+    if api_config.async_db:
+        instrument_engine(AsyncDatabase().engine.sync_engine)
+    profiler = ProfilerService()
+    # Prices are stored by the crawler workers, in their own processes. The
+    # cache follows them from the start, price streams start the tailer too.
+    if CacheService().enabled:
+        HistoryTailer().start()
+
+    @app.before_request
+    def assign_request_id():
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        request_id_var.set(request_id)
+
+    @app.before_request
+    def start_request_timer():
+        request_timer.start()
+
+    @app.before_request
+    def start_profiler():
+        profiler.start()
+
+    # Teardown hooks run in reverse order too, the id is cleared last so it
+    # does not tag later lines of a reused worker thread
+    @app.teardown_request
+    def clear_request_id(_error):
+        request_id_var.set(None)
+
+    # Teardown runs once streamed responses are fully sent
+    @app.teardown_request
+    def stop_profiler(_error):
+        profiler.stop()
+
+    # after_request hooks run in reverse order, the timer sees compression too
+    @app.after_request
+    def finish_request_timer(response):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        return request_timer.finish(response, route, request.method)
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response)
+
+    @app.after_request
+    def add_request_id(response):
+        response.headers[REQUEST_ID_HEADER] = request_id_var.get()
+        return response
+
     @app.errorhandler(404)
     def catch_404s(error):  # Accept the exception as an argument
         # Check if the current request matches the /api prefix
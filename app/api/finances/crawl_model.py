@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+from enum import Enum
+
+from sqlalchemy import (
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    TIMESTAMP,
+    UniqueConstraint,
+    text,
+)
+
+from db.db import Database
+
+Base = Database().Base
+
+# Timed phases of a crawl task, stored in the <phase>_seconds columns
+CRAWL_TASK_PHASES = (
+    "queue_wait",
+    "driver",
+    "navigation",
+    "element_wait",
+    "parse",
+    "persist",
+)
+
+
+class CrawlStatus(Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class CrawlTaskStatus(Enum):
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    # Gave up after CRAWL_MAX_ATTEMPTS, kept for inspection
+    DEAD = "dead"
+
+
+class Crawl(Base):
+    __tablename__ = "crawls"
+    # At most one crawl runs at a time, whichever node plans it first
+    __table_args__ = (
+        Index(
+            "ix_crawls_single_running",
+            "status",
+            unique=True,
+            sqlite_where=text("status = 'running'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    status = Column(String(20), nullable=False, default=CrawlStatus.RUNNING.value)
+    request_id = Column(String(128), nullable=True)
+
+    created_at = Column(
+        TIMESTAMP, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    completed_at = Column(TIMESTAMP, nullable=True)
+
+    def __repr__(self):
+        return f"<Crawl(id={self.id}, status={self.status})>"
+
+    def __str__(self):
+        return f"<Crawl(id={self.id}, status={self.status})>"
+
+
+class CrawlTask(Base):
+    __tablename__ = "crawl_tasks"
+    __table_args__ = (
+        UniqueConstraint("crawl_id", "symbol"),
+        Index("ix_crawl_tasks_status_visible_at", "status", "visible_at"),
+        Index("ix_crawl_tasks_lease_owner", "lease_owner"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # None for the tasks queued by the crawl scheduler
+    crawl_id = Column(
+        Integer, ForeignKey("crawls.id", ondelete="CASCADE"), nullable=True
+    )
+    symbol = Column(String(50), nullable=False)
+
+    status = Column(String(20), nullable=False, default=CrawlTaskStatus.PENDING.value)
+    # A pending or leased task can be claimed from visible_at on, it is the
+    # retry backoff of a pending task and the lease expiry of a leased one
+    visible_at = Column(
+        TIMESTAMP, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    lease_owner = Column(String(100), nullable=True)
+    heartbeat_at = Column(TIMESTAMP, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+
+    # Timings of the last attempt. queue_wait runs from visible_at until the
+    # fetch starts, driver is the browser launch (0 when it was reused) and
+    # persist is storing the price, without the commit.
+    queue_wait_seconds = Column(Float, nullable=True)
+    driver_seconds = Column(Float, nullable=True)
+    navigation_seconds = Column(Float, nullable=True)
+    element_wait_seconds = Column(Float, nullable=True)
+    parse_seconds = Column(Float, nullable=True)
+    persist_seconds = Column(Float, nullable=True)
+
+    created_at = Column(
+        TIMESTAMP, nullable=False, default=lambda: datetime.now(timezone.utc)
+    )
+    completed_at = Column(TIMESTAMP, nullable=True)
+
+    def __repr__(self):
+        return f"<CrawlTask(id={self.id}, symbol={self.symbol}, status={self.status})>"
+
+    def __str__(self):
+        return f"<CrawlTask(id={self.id}, symbol={self.symbol}, status={self.status})>"
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.utils.api_exceptions import APIError
+from app.api.finances.finance_model import Finance
+from app.api.finances.finance_service import (
+    FINANCES_TAG,
+    finance_tags,
+    history_points,
+    select_finance_columns,
+    strip_unrequested_fields,
+)
+from app.services.cache_service import CacheService
+from db.db import AsyncDatabase
+
+cache = CacheService()
+
+
+class AsyncFinanceService:
+    """
+    Read side of FinanceService on the asyncio engine. Cache namespaces are
+    shared with FinanceService, so its writes invalidate these reads too.
+    """
+
+    def __init__(self):
+        self.db = AsyncDatabase()
+
+    @cache.cached("finances.get_all_finances_symbols", tags=[FINANCES_TAG])
+    async def get_all_finances_symbols(self):
+        try:
+            async with self.db.session_local() as session:
+                finances = await session.execute(
+                    select(Finance.id, Finance.symbol, Finance.is_tracking)
+                )
+                return [
+                    {
+                        "id": finance.id,
+                        "symbol": finance.symbol,
+                        "is_tracking": finance.is_tracking,
+                    }
+                    for finance in finances
+                ]
+        except SQLAlchemyError as e:
+            raise APIError("Failed to retrieve finances", str(e), 500) from e
+
+    async def get_finance_details_by_symbol(
+        self, symbol, include_history=False, from_ts=None, to_ts=None, fields=None
+    ):
+        finance = await self._get_finance_details(
+            symbol, include_history, from_ts, to_ts, fields
+        )
+        return strip_unrequested_fields(finance, fields)
+
+    @cache.cached("finances.get_finance_details_by_symbol", tags=finance_tags)
+    async def _get_finance_details(
+        self, symbol, include_history, from_ts, to_ts, fields
+    ):
+        finance_columns, history_columns, include_history = select_finance_columns(
+            fields, include_history
+        )
+
+        try:
+            if from_ts is None:
+                from_ts = datetime.now(timezone.utc) - timedelta(days=7)
+            if to_ts is None:
+                to_ts = datetime.now(timezone.utc)
+
+            async with self.db.session_local() as session:
+                finance = (
+                    await session.execute(
+                        select(*finance_columns.values()).filter_by(symbol=symbol)
+                    )
+                ).first()
+                if not finance:
+                    raise APIError(
+                        "Finance not found",
+                        f"Finance with symbol {symbol} not found",
+                        404,
+                    )
+
+                finance_history = []
+                if include_history:
+                    points = history_points(finance.id, from_ts, to_ts)
+                    finance_history = await session.execute(
+                        select(*(points.c[key] for key in history_columns)).order_by(
+                            points.c.created_at
+                        )
+                    )
+
+                formatted_result = dict(zip(finance_columns, finance))
+                if fields is None or include_history:
+                    formatted_result["finance_history"] = [
+                        dict(zip(history_columns, history))
+                        for history in finance_history
+                    ]
+
+                return formatted_result
+
+        except SQLAlchemyError as e:
+            raise APIError("Failed to retrieve finance", str(e), 500) from e
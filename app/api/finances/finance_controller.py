@@ -1,61 +1,240 @@
-from datetime import datetime
+import csv
+import io
+from datetime import timezone
 
-from flask import Blueprint, jsonify, request
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
 from marshmallow import ValidationError
 
+from app.utils.api_columnar import (
+    COLUMNAR_MIMETYPE,
+    build_history_columns,
+    encode_history_columns,
+)
+from app.utils.api_consts import APIConfig
 from app.utils.api_exceptions import APIError
-from app.api.finances.finance_service import FinanceService
+from app.utils.api_utils import get_fields_arg, get_timestamp_arg, service_response
+from app.api.finances.finance_async_service import AsyncFinanceService
+from app.api.finances.finance_service import (
+    FINANCE_FIELDS,
+    FinanceService,
+    price_broker,
+)
 from app.api.finances.finance_schema import CreateFinanceSchema, UpdateFinanceSchema
+from app.services.history_tailer_service import HistoryTailer
+
+api_config = APIConfig()
 
 finance_bp = Blueprint("finance", __name__)
 finance_service = FinanceService()
+# Reads go through the asyncio engine when ASYNC_DB is set
+read_finance_service = (
+    AsyncFinanceService() if api_config.async_db else finance_service
+)
+
+history_tailer = HistoryTailer()
 
 create_finance_schema = CreateFinanceSchema()
 update_finance_schema = UpdateFinanceSchema()
 
+# Formats of GET /<symbol>/history, selectable through ?format= or Accept
+HISTORY_FORMATS_BY_MIMETYPE = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "text/csv": "csv",
+    COLUMNAR_MIMETYPE: "columnar",
+}
+
 
 @finance_bp.get("/")
+@service_response
 def get_finances():
     # SERVICE
-    finances = finance_service.get_all_finances_symbols()
+    return read_finance_service.get_all_finances_symbols()
+
+
+@finance_bp.get("/stream")
+def stream_finance_prices():
+    # QUERY PARAMS
+    symbols = request.args.get("symbols", default="")
+    symbols = {symbol.strip() for symbol in symbols.split(",") if symbol.strip()}
+    # SERVICE
+    # Prices reach this process through the tailer, started with the first
+    # stream when the cache did not need it
+    history_tailer.start()
+    subscription = price_broker.subscribe(symbols)
+    if subscription is None:
+        raise APIError(
+            "Too many price streams",
+            "Price stream subscriber limit reached",
+            503,
+        )
+    dumps = current_app.json.dumps
+    heartbeat_seconds = api_config.sse_heartbeat_seconds
+
+    def generate():
+        try:
+            yield f"retry: {heartbeat_seconds * 1000}\n\n"
+            while not subscription.dropped:
+                event = subscription.next_event(timeout=heartbeat_seconds)
+                if event is None:
+                    # Comment line, keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event['id']}\nevent: price\ndata: {dumps(event)}\n\n"
+            yield "event: dropped\ndata: {}\n\n"
+        finally:
+            price_broker.unsubscribe(subscription)
+
     # RESPONSE
-    return jsonify(finances)
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @finance_bp.get("/<string:symbol>")
+@service_response
 def get_finance_by_symbol(symbol):
     # QUERY PARAMS
     with_history = request.args.get("with_history", default="false").lower() == "true"
-    from_ts = request.args.get("from_ts")
-    to_ts = request.args.get("to_ts")
+    from_ts = get_timestamp_arg("from_ts")
+    to_ts = get_timestamp_arg("to_ts")
+    fields = get_fields_arg(FINANCE_FIELDS)
 
     # VALIDATION
     if not isinstance(symbol, str):
         raise APIError(
             "Invalid route parameter", f"Invalid route parameter: {symbol}", 400
         )
+    # SERVICE
+    return read_finance_service.get_finance_details_by_symbol(
+        symbol, with_history, from_ts, to_ts, fields
+    )
 
-    if from_ts:
-        try:
-            from_ts = datetime.fromisoformat(from_ts)
-        except ValueError as e:
-            raise APIError(
-                "Invalid from_ts", "Invalid 'from_ts' timestamp format", 400
-            ) from e
 
-    if to_ts:
-        try:
-            to_ts = datetime.fromisoformat(to_ts)
-        except ValueError as e:
-            raise APIError(
-                "Invalid to_ts", "Invalid 'to_ts' timestamp format", 400
-            ) from e
+@finance_bp.get("/<string:symbol>/history")
+def get_finance_history(symbol):
+    # QUERY PARAMS
+    from_ts = get_timestamp_arg("from_ts")
+    to_ts = get_timestamp_arg("to_ts")
+    history_format = request.args.get("format")
+    ts_encoding = request.args.get("ts_encoding", default="raw")
+
+    # VALIDATION
+    if history_format is None:
+        history_format = HISTORY_FORMATS_BY_MIMETYPE.get(
+            request.accept_mimetypes.best_match(
+                HISTORY_FORMATS_BY_MIMETYPE, default="application/json"
+            ),
+            "json",
+        )
+    if history_format not in HISTORY_FORMATS_BY_MIMETYPE.values():
+        raise APIError(
+            "Invalid format",
+            f"Invalid history format: {history_format}",
+            400,
+        )
+    if ts_encoding not in ("raw", "delta"):
+        raise APIError(
+            "Invalid ts_encoding",
+            f"Invalid timestamp encoding: {ts_encoding}",
+            400,
+        )
+
     # SERVICE
-    finance = finance_service.get_finance_details_by_symbol(
-        symbol, with_history, from_ts, to_ts
+    batches = finance_service.get_finance_history_batches(
+        symbol, from_ts, to_ts, epoch_ms=history_format == "columnar"
     )
+
+    # RESPONSE
+    if history_format == "ndjson":
+        return _ndjson_history_response(batches)
+    if history_format == "csv":
+        return _csv_history_response(symbol, batches)
+    if history_format == "columnar":
+        prices, timestamps = build_history_columns(batches)
+        return Response(
+            encode_history_columns(
+                prices, timestamps, delta=ts_encoding == "delta"
+            ),
+            mimetype=COLUMNAR_MIMETYPE,
+        )
+    return jsonify(
+        [
+            {"current_price": price, "created_at": created_at}
+            for batch in batches
+            for price, created_at in batch
+        ]
+    )
+
+
+@finance_bp.get("/<string:symbol>/history.ndjson")
+def export_finance_history_ndjson(symbol):
+    # QUERY PARAMS
+    from_ts = get_timestamp_arg("from_ts")
+    to_ts = get_timestamp_arg("to_ts")
+    # SERVICE
+    batches = finance_service.get_finance_history_batches(symbol, from_ts, to_ts)
+    # RESPONSE
+    return _ndjson_history_response(batches)
+
+
+@finance_bp.get("/<string:symbol>/history.csv")
+def export_finance_history_csv(symbol):
+    # QUERY PARAMS
+    from_ts = get_timestamp_arg("from_ts")
+    to_ts = get_timestamp_arg("to_ts")
+    # SERVICE
+    batches = finance_service.get_finance_history_batches(symbol, from_ts, to_ts)
     # RESPONSE
-    return jsonify(finance)
+    return _csv_history_response(symbol, batches)
+
+
+def _ndjson_history_response(batches):
+    dumps = current_app.json.dumps
+
+    def generate():
+        for batch in batches:
+            yield "".join(
+                f"{dumps({'current_price': price, 'created_at': created_at})}\n"
+                for price, created_at in batch
+            )
+
+    return Response(
+        stream_with_context(generate()), mimetype="application/x-ndjson"
+    )
+
+
+def _csv_history_response(symbol, batches):
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["created_at", "current_price"])
+        yield buffer.getvalue()
+        for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                (created_at.replace(tzinfo=timezone.utc).isoformat(), price)
+                for price, created_at in batch
+            )
+            yield buffer.getvalue()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="{symbol}-history.csv"'
+        },
+    )
 
 
 @finance_bp.post("/")
@@ -127,3 +306,11 @@ def execute_finance_crawl():
         return jsonify(finance_crawl_result), 200
     except APIError as e:
         return jsonify({"error": str(e)}), 500
+
+
+@finance_bp.get("/crawl/<int:crawl_id>")
+def get_crawl(crawl_id):
+    # SERVICE
+    crawl = finance_service.get_crawl(crawl_id)
+    # RESPONSE
+    return jsonify(crawl)
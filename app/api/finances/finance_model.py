@@ -1,23 +1,68 @@
-from datetime import datetime, timezone
-
-from sqlalchemy import Column, Boolean, Integer, Float, String, ForeignKey, TIMESTAMP
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import (
+    Column,
+    Boolean,
+    Integer,
+    Float,
+    String,
+    ForeignKey,
+    Index,
+    TIMESTAMP,
+    TypeDecorator,
+    text,
+)
 
 from db.db import Database
 
 Base = Database().Base
 
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class EpochMillis(TypeDecorator):
+    """
+    Datetime stored as integer milliseconds since the epoch. Naive values are
+    taken as UTC, results come back as aware UTC datetimes.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return (value - EPOCH) // timedelta(milliseconds=1)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return EPOCH + timedelta(milliseconds=value)
+
 
 class Finance(Base):
     __tablename__ = "finances"
+    __table_args__ = (
+        Index("ix_finances_tracking_next_crawl_at", "is_tracking", "next_crawl_at"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     symbol = Column(String(50), nullable=False, unique=True)
 
     is_tracking = Column(Boolean, nullable=False, default=False)
+    # Tracked symbols are queued by the crawl scheduler, None uses the
+    # CRAWL_INTERVAL_SECONDS default
+    crawl_interval_seconds = Column(Integer, nullable=True)
+    next_crawl_at = Column(TIMESTAMP, nullable=True)
 
     last_closing_price = Column(Integer, nullable=True)
     daily_change_value = Column(Float, nullable=True)
     daily_change_percentage = Column(Float, nullable=True)
+    # Time of the latest price the daily change was computed from, newer
+    # prices make the finance due for the next computation
+    daily_change_as_of = Column(EpochMillis, nullable=True)
 
     created_at = Column(
         TIMESTAMP, nullable=False, default=lambda: datetime.now(timezone.utc)
@@ -38,17 +83,36 @@ class Finance(Base):
 
 class FinanceHistory(Base):
     __tablename__ = "finance_history"
+    # Rows are clustered by finance and time, a range of one finance is a
+    # single contiguous read of the primary key
+    __table_args__ = (
+        Index(
+            "ix_finance_history_last_seen_epoch_ms",
+            "last_seen_epoch_ms",
+            sqlite_where=text("last_seen_epoch_ms IS NOT NULL"),
+        ),
+        {"sqlite_with_rowid": False},
+    )
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    finance_id = Column(Integer, ForeignKey("finances.id"), nullable=False)
-    current_price = Column(Float, nullable=False)
-
+    finance_id = Column(
+        Integer,
+        ForeignKey("finances.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
     created_at = Column(
-        TIMESTAMP, nullable=False, default=lambda: datetime.now(timezone.utc)
+        "ts_epoch_ms",
+        EpochMillis,
+        primary_key=True,
+        default=lambda: datetime.now(timezone.utc),
     )
+    current_price = Column(Float, nullable=False)
+
+    # Last crawl that still saw current_price with CRAWL_DEDUP, the row then
+    # stands for a point at created_at and another one at last_seen_at
+    last_seen_at = Column("last_seen_epoch_ms", EpochMillis, nullable=True)
 
     def __repr__(self):
-        return f"<FinanceHistory(id={self.id}, finance_id={self.finance_id}, current_price={self.current_price})>"
+        return f"<FinanceHistory(finance_id={self.finance_id}, created_at={self.created_at}, current_price={self.current_price})>"
 
     def __str__(self):
-        return f"<FinanceHistory(id={self.id}, finance_id={self.finance_id}, current_price={self.current_price})>"
+        return f"<FinanceHistory(finance_id={self.finance_id}, created_at={self.created_at}, current_price={self.current_price})>"
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 
 
 class CreateFinanceSchema(Schema):
@@ -7,6 +7,7 @@ class CreateFinanceSchema(Schema):
 
 class UpdateFinanceSchema(Schema):
     is_tracking = fields.Boolean()
+    crawl_interval_seconds = fields.Integer(validate=validate.Range(min=1))
     last_closing_price = fields.Float()
     daily_change_value = fields.Float()
     daily_change_percentage = fields.Float()
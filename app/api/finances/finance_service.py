@@ -1,22 +1,143 @@
 from datetime import datetime, timedelta, timezone
-import threading
 
+from sqlalchemy import Integer, select, type_coerce, union_all
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.utils.api_exceptions import APIError
+from app.utils.api_consts import APIConfig
+from app.utils.api_exceptions import APIError, APIWarn
 from app.api.finances.finance_model import Finance, FinanceHistory
-from app.services.selenium_service import SeleniumRequestProcessor
+from app.services.cache_service import CacheService
+from app.services.crawl_coordinator_service import CrawlCoordinator
+from app.services.logger_service import LoggerService, request_id_var
+from app.services.metrics_service import MetricsService
+from app.services.price_broker_service import PriceBroker
 from db.db import Database
 
-selenium_request_processor = SeleniumRequestProcessor()
+api_config = APIConfig()
+cache = CacheService()
+crawl_coordinator = CrawlCoordinator()
+logger = LoggerService()
+price_broker = PriceBroker()
+
+
+def _crawler_queue_depth():
+    # Skipped when the database can not be read, a scrape must not fail
+    try:
+        return crawl_coordinator.count_open_tasks()
+    except SQLAlchemyError:
+        return None
+
+
+def _crawler_phase_durations():
+    try:
+        histograms = crawl_coordinator.phase_histograms()
+    except SQLAlchemyError:
+        return None
+    return {(("phase", phase),): histogram for phase, histogram in histograms.items()}
+
+
+MetricsService().register_callback(
+    "crawler_queue_depth",
+    _crawler_queue_depth,
+    help_text="Crawl tasks pending or leased by the crawler workers",
+)
+MetricsService().register_callback(
+    "crawler_phase_duration_seconds",
+    _crawler_phase_durations,
+    metric_type="histogram",
+    help_text="Time spent in each phase of the finished crawl tasks",
+)
+
+# Rows fetched per round trip when streaming history
+HISTORY_BATCH_SIZE = 1000
+
+
+def history_points(finance_id, from_ts, to_ts):
+    # The price series of a finance as (current_price, created_at) points. A
+    # row extended by CRAWL_DEDUP adds a second point at its last_seen_at, so
+    # the series has the same steps as with a row per crawl.
+    return union_all(
+        select(FinanceHistory.current_price, FinanceHistory.created_at).where(
+            FinanceHistory.finance_id == finance_id,
+            FinanceHistory.created_at > from_ts,
+            FinanceHistory.created_at < to_ts,
+        ),
+        select(
+            FinanceHistory.current_price,
+            FinanceHistory.last_seen_at.label("created_at"),
+        ).where(
+            FinanceHistory.finance_id == finance_id,
+            FinanceHistory.last_seen_at > from_ts,
+            FinanceHistory.last_seen_at < to_ts,
+        ),
+    ).subquery("history_points")
+
+
+# Selectable fields of a finance, in response order
+FINANCE_COLUMNS = {
+    "id": Finance.id,
+    "symbol": Finance.symbol,
+    "is_tracking": Finance.is_tracking,
+    "crawl_interval_seconds": Finance.crawl_interval_seconds,
+    "last_closing_price": Finance.last_closing_price,
+    "daily_change_value": Finance.daily_change_value,
+    "daily_change_percentage": Finance.daily_change_percentage,
+    "created_at": Finance.created_at,
+    "updated_at": Finance.updated_at,
+}
+FINANCE_HISTORY_COLUMNS = {
+    "current_price": FinanceHistory.current_price,
+    "created_at": FinanceHistory.created_at,
+}
+FINANCE_FIELDS = {
+    *FINANCE_COLUMNS,
+    "finance_history",
+    *(f"finance_history.{key}" for key in FINANCE_HISTORY_COLUMNS),
+}
+
+# Cache tags
+FINANCES_TAG = "finances"
+
+
+def finance_tags(finance):
+    return [f"finance:{finance['symbol']}", f"finance_id:{finance['id']}"]
+
+
+def select_finance_columns(fields, include_history):
+    # Columns to load for a sparse fieldset, returns the finance columns, the
+    # history columns and whether history has to be loaded at all
+    if fields is None:
+        return FINANCE_COLUMNS, FINANCE_HISTORY_COLUMNS, include_history
+
+    # id and symbol are always loaded for cache invalidation
+    finance_columns = {
+        key: column
+        for key, column in FINANCE_COLUMNS.items()
+        if key in fields or key in ("id", "symbol")
+    }
+    history_columns = {
+        key: column
+        for key, column in FINANCE_HISTORY_COLUMNS.items()
+        if "finance_history" in fields or f"finance_history.{key}" in fields
+    }
+    return finance_columns, history_columns, bool(history_columns)
+
+
+def strip_unrequested_fields(finance, fields):
+    if fields is None:
+        return finance
+    return {
+        key: value
+        for key, value in finance.items()
+        if key in fields or key == "finance_history"
+    }
 
 
 class FinanceService:
     def __init__(self):
         self.db = Database()
-        self.is_running = False
-        self.lock = threading.Lock()
 
+    @cache.cached("finances.get_all_finances_symbols", tags=[FINANCES_TAG])
     def get_all_finances_symbols(self):
         try:
             with self.db.session_local() as session:
@@ -35,8 +156,21 @@ class FinanceService:
             raise APIError("Failed to retrieve finances", str(e), 500) from e
 
     def get_finance_details_by_symbol(
-        self, symbol, include_history=False, from_ts=None, to_ts=None
+        self, symbol, include_history=False, from_ts=None, to_ts=None, fields=None
     ):
+        # `fields` is a sparse fieldset as accepted by FINANCE_FIELDS, only the
+        # requested columns are selected and returned
+        finance = self._get_finance_details(
+            symbol, include_history, from_ts, to_ts, fields
+        )
+        return strip_unrequested_fields(finance, fields)
+
+    @cache.cached("finances.get_finance_details_by_symbol", tags=finance_tags)
+    def _get_finance_details(self, symbol, include_history, from_ts, to_ts, fields):
+        finance_columns, history_columns, include_history = select_finance_columns(
+            fields, include_history
+        )
+
         try:
 
             if from_ts is None:
@@ -45,7 +179,11 @@ class FinanceService:
                 to_ts = datetime.now(timezone.utc)
 
             with self.db.session_local() as session:
-                finance = session.query(Finance).filter_by(symbol=symbol).first()
+                finance = (
+                    session.query(*finance_columns.values())
+                    .filter_by(symbol=symbol)
+                    .first()
+                )
                 if not finance:
                     raise APIError(
                         "Finance not found",
@@ -55,39 +193,86 @@ class FinanceService:
 
                 finance_history = []
                 if include_history:
+                    points = history_points(finance.id, from_ts, to_ts)
                     finance_history = (
-                        session.query(FinanceHistory)
-                        .filter(
-                            FinanceHistory.finance_id == finance.id,
-                            FinanceHistory.created_at > from_ts,
-                            FinanceHistory.created_at < to_ts,
-                        )
+                        session.query(*(points.c[key] for key in history_columns))
+                        .order_by(points.c.created_at)
                         .all()
                     )
 
-                formatted_result = {
-                    "id": finance.id,
-                    "symbol": finance.symbol,
-                    "is_tracking": finance.is_tracking,
-                    "last_closing_price": finance.last_closing_price,
-                    "daily_change_value": finance.daily_change_value,
-                    "daily_change_percentage": finance.daily_change_percentage,
-                    "created_at": finance.created_at,
-                    "updated_at": finance.updated_at,
-                    "finance_history": [
-                        {
-                            "current_price": history.current_price,
-                            "created_at": history.created_at,
-                        }
+                formatted_result = dict(zip(finance_columns, finance))
+                if fields is None or include_history:
+                    formatted_result["finance_history"] = [
+                        dict(zip(history_columns, history))
                         for history in finance_history
-                    ],
-                }
+                    ]
 
                 return formatted_result
 
         except SQLAlchemyError as e:
             raise APIError("Failed to retrieve finance", str(e), 500) from e
 
+    def get_finance_history_batches(
+        self,
+        symbol,
+        from_ts=None,
+        to_ts=None,
+        batch_size=HISTORY_BATCH_SIZE,
+        epoch_ms=False,
+    ):
+        # Resolves the symbol up front so a missing finance is still a 404,
+        # the rows themselves are only read while the response is consumed.
+        # With epoch_ms the timestamps come back as integer milliseconds.
+        if from_ts is None:
+            from_ts = datetime.now(timezone.utc) - timedelta(days=7)
+        if to_ts is None:
+            to_ts = datetime.now(timezone.utc)
+
+        try:
+            with self.db.session_local() as session:
+                finance_id = (
+                    session.query(Finance.id).filter_by(symbol=symbol).scalar()
+                )
+        except SQLAlchemyError as e:
+            raise APIError("Failed to retrieve finance", str(e), 500) from e
+
+        if finance_id is None:
+            raise APIError(
+                "Finance not found",
+                f"Finance with symbol {symbol} not found",
+                404,
+            )
+
+        return self._iter_finance_history(
+            finance_id, from_ts, to_ts, batch_size, epoch_ms
+        )
+
+    def _iter_finance_history(self, finance_id, from_ts, to_ts, batch_size, epoch_ms):
+        # Yields lists of (current_price, created_at) tuples from a server-side
+        # cursor, on a dedicated connection that lives as long as the stream
+        points = history_points(finance_id, from_ts, to_ts)
+        query = select(
+            points.c.current_price,
+            # Stored as epoch milliseconds, read raw
+            type_coerce(points.c.created_at, Integer)
+            if epoch_ms
+            else points.c.created_at,
+        ).order_by(points.c.created_at)
+        try:
+            with self.db.engine.connect() as connection:
+                result = connection.execution_options(yield_per=batch_size).execute(
+                    query
+                )
+                for partition in result.partitions():
+                    yield partition
+        except SQLAlchemyError as e:
+            # Headers are already sent, the stream can only be cut short
+            logger.error(
+                f"Failed to stream finance history: {e}",
+                route="INTERNAL/FinanceService",
+                func="_iter_finance_history",
+            )
+
     def create_finance_by_symbol(self, symbol):
         try:
             with self.db.session_local() as session:
@@ -102,6 +287,7 @@ class FinanceService:
                 new_finance = Finance(symbol=symbol)
                 session.add(new_finance)
                 session.commit()
+                cache.invalidate(FINANCES_TAG, f"finance:{symbol}")
 
                 return {"id": new_finance.id, "symbol": new_finance.symbol}
 
@@ -115,6 +301,7 @@ class FinanceService:
         last_closing_price=None,
         daily_change_value=None,
         daily_change_percentage=None,
+        crawl_interval_seconds=None,
     ):
         try:
             with self.db.session_local() as session:
@@ -129,6 +316,11 @@ class FinanceService:
 
                 if is_tracking is not None:
                     finance.is_tracking = is_tracking
+                if crawl_interval_seconds is not None:
+                    finance.crawl_interval_seconds = crawl_interval_seconds
+                # The scheduler gives the symbol a fresh start time
+                if is_tracking is not None or crawl_interval_seconds is not None:
+                    finance.next_crawl_at = None
                 if last_closing_price is not None:
                     finance.last_closing_price = last_closing_price
                 if daily_change_value is not None:
@@ -138,6 +330,11 @@ class FinanceService:
 
                 session.commit()
 
+                # Only the tracking flag is part of the symbols list
+                if is_tracking is not None:
+                    cache.invalidate(FINANCES_TAG)
+                cache.invalidate(f"finance:{symbol}")
+
                 return {"id": finance.id, "symbol": finance.symbol}
 
         except SQLAlchemyError as e:
@@ -156,85 +353,62 @@ class FinanceService:
 
                 session.delete(finance)
                 session.commit()
+                cache.invalidate(FINANCES_TAG, f"finance:{symbol}")
 
                 return {"message": "Finance deleted successfully"}
 
         except SQLAlchemyError as e:
             raise APIError("Failed to delete finance", str(e), 500) from e
 
-    def create_finance_history(self, finance_id, current_price, created_at):
+    def execute_finance_crawl_by_symbols(self):
+        if api_config.api_only:
+            raise APIWarn(
+                "Crawler disabled",
+                "503 Crawl requested while running in API_ONLY mode",
+                503,
+            )
+
+        # Only queues the crawl, the crawler workers (python -m app.crawler)
+        # run it. Planning is idempotent, a running crawl is returned as is.
+        symbols = [
+            finance["symbol"]
+            for finance in self.get_all_finances_symbols()
+            if finance["is_tracking"]
+        ]
         try:
-            with self.db.session_local() as session:
-                finance_history = FinanceHistory(
-                    finance_id=finance_id,
-                    current_price=current_price,
-                    created_at=created_at,
-                )
-                session.add(finance_history)
-                session.commit()
-
-                return {
-                    "id": finance_history.id,
-                    "created_at": finance_history.created_at,
-                }
-
+            crawl_id, planned = crawl_coordinator.plan_crawl(
+                symbols, request_id=request_id_var.get()
+            )
         except SQLAlchemyError as e:
-            raise APIError("Failed to create finance history", str(e), 500) from e
+            raise APIError("Failed to plan crawl", str(e), 500) from e
 
-    def execute_finance_crawl_by_symbols(self):
-        with self.lock:
-            if self.is_running:
-                return {
-                    "message": "Request processor currently running.",
-                }
-
-            self.is_running = True
-
-        thread = threading.Thread(target=self._run_crawl_process)
-        thread.start()
         return {
-            "message": "Request processor started.",
+            "message": "Crawl queued." if planned else "Crawl already running.",
+            "crawl_id": crawl_id,
         }
 
-    def _run_crawl_process(self):
+    def get_crawl(self, crawl_id):
         try:
-            finances = self.get_all_finances_symbols()
-
-            # Add requests to the processor
-            for finance in finances:
-                selenium_request_processor.add_request(finance["symbol"])
-
-            # Start processing
-            selenium_request_processor.start()
-            selenium_request_processor.stop()
-
-            # Process results
-            for result in selenium_request_processor.get_results():
-                matching_finance = next(
-                    (
-                        finance
-                        for finance in finances
-                        if finance["symbol"] == result["symbol"]
-                    ),
-                    None,
-                )
-                if matching_finance:
-                    # Strip "$" sign from the price
-                    current_price = float(result["price"][1:])
-                    self.create_finance_history(
-                        finance_id=matching_finance["id"],
-                        current_price=current_price,
-                        created_at=result["timestamp"],
-                    )
+            crawl = crawl_coordinator.get_crawl(crawl_id)
+        except SQLAlchemyError as e:
+            raise APIError("Failed to retrieve crawl", str(e), 500) from e
 
-        finally:
-            with self.lock:
-                self.is_running = False
+        if crawl is None:
+            raise APIError(
+                "Crawl not found", f"Crawl with ID {crawl_id} not found", 404
+            )
+        return crawl
 
     def is_crawler_running(self):
-        if self.is_running:
+        try:
+            crawl = crawl_coordinator.get_running_crawl()
+        except SQLAlchemyError as e:
+            raise APIError("Failed to retrieve crawl", str(e), 500) from e
+
+        if crawl is not None:
             return {
                 "message": "Request processor currently running",
+                "crawl_id": crawl["id"],
             }
         return {
             "message": "Request processor is available",
@@ -0,0 +1,45 @@
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.utils.api_exceptions import APIError
+from app.api.items.item_model import Item
+from app.api.items.item_service import ITEM_COLUMNS, ITEMS_TAG, item_tags
+from app.services.cache_service import CacheService
+from db.db import AsyncDatabase
+
+cache = CacheService()
+
+
+class AsyncItemService:
+    """
+    Read side of ItemService on the asyncio engine. Cache namespaces are
+    shared with ItemService, so its writes invalidate these reads too.
+    """
+
+    def __init__(self):
+        self.db = AsyncDatabase()
+
+    @cache.cached("items.get_all_items", tags=[ITEMS_TAG])
+    async def get_all_items(self, fields=None):
+        columns = ITEM_COLUMNS
+        if fields is not None:
+            columns = {key: column for key, column in columns.items() if key in fields}
+        try:
+            async with self.db.session_local() as session:
+                items = await session.execute(select(*columns.values()))
+                return [dict(zip(columns, item)) for item in items]
+        except SQLAlchemyError as e:
+            raise APIError("Failed to retrieve items", str(e), 500) from e
+
+    @cache.cached("items.get_item_by_id", tags=item_tags)
+    async def get_item_by_id(self, item_id):
+        try:
+            async with self.db.session_local() as session:
+                item = await session.get(Item, item_id)
+                if not item:
+                    raise APIError(
+                        "Item not found", f"Item with ID {item_id} not found", 404
+                    )
+                return {"id": item.id, "name": item.name}
+        except SQLAlchemyError as e:
+            raise APIError("Failed to retrieve item", str(e), 500) from e
@@ -1,27 +1,35 @@
 from flask import Blueprint, jsonify, request
 from marshmallow import ValidationError
 
+from app.utils.api_consts import APIConfig
 from app.utils.api_exceptions import APIError
+from app.api.items.item_async_service import AsyncItemService
 from app.api.items.item_schema import CreateItemSchema, UpdateItemSchema
-from app.api.items.item_service import ItemService
+from app.api.items.item_service import ITEM_FIELDS, ItemService
+from app.utils.api_utils import get_fields_arg, service_response
 
+api_config = APIConfig()
 
 item_bp = Blueprint("item", __name__)
 item_service = ItemService()
+# Reads go through the asyncio engine when ASYNC_DB is set
+read_item_service = AsyncItemService() if api_config.async_db else item_service
 
 create_item_schema = CreateItemSchema()
 update_item_schema = UpdateItemSchema()
 
 
 @item_bp.get("/")
+@service_response
 def get_items():
+    # QUERY PARAMS
+    fields = get_fields_arg(ITEM_FIELDS)
     # SERVICE
-    items = item_service.get_all_items()
-    # RESPONSE
-    return jsonify(items)
+    return read_item_service.get_all_items(fields)
 
 
 @item_bp.get("/<int:item_id>")
+@service_response
 def get_item_by_id(item_id):
     # VALIDATION
     if not isinstance(item_id, int):
@@ -29,9 +37,7 @@ def get_item_by_id(item_id):
             "Invalid route parameter", f"Invalid route parameter: {item_id}", 400
         )
     # SERVICE
-    item = item_service.get_item_by_id(item_id)
-    # RESPONSE
-    return jsonify(item)
+    return read_item_service.get_item_by_id(item_id)
 
 
 @item_bp.post("/")
@@ -2,21 +2,40 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.utils.api_exceptions import APIError
 from app.api.items.item_model import Item
+from app.services.cache_service import CacheService
 from db.db import Database
 
+cache = CacheService()
+
+# Selectable fields of an item, in response order
+ITEM_COLUMNS = {"id": Item.id, "name": Item.name}
+ITEM_FIELDS = set(ITEM_COLUMNS)
+
+# Cache tags
+ITEMS_TAG = "items"
+
+
+def item_tags(item):
+    return [f"item:{item['id']}"]
+
 
 class ItemService:
     def __init__(self):
         self.db = Database()
 
-    def get_all_items(self):
+    @cache.cached("items.get_all_items", tags=[ITEMS_TAG])
+    def get_all_items(self, fields=None):
+        columns = ITEM_COLUMNS
+        if fields is not None:
+            columns = {key: column for key, column in columns.items() if key in fields}
         try:
             with self.db.session_local() as session:
-                items = session.query(Item).all()
-                return [{"id": item.id, "name": item.name} for item in items]
+                items = session.query(*columns.values()).all()
+                return [dict(zip(columns, item)) for item in items]
         except SQLAlchemyError as e:
             raise APIError("Failed to retrieve items", str(e), 500) from e
 
+    @cache.cached("items.get_item_by_id", tags=item_tags)
     def get_item_by_id(self, item_id):
         try:
             with self.db.session_local() as session:
@@ -35,6 +54,7 @@ class ItemService:
                 new_item = Item(name=name)
                 session.add(new_item)
                 session.commit()
+                cache.invalidate(ITEMS_TAG)
                 return {"id": new_item.id, "name": new_item.name}
         except SQLAlchemyError as e:
             session.rollback()
@@ -50,6 +70,7 @@ class ItemService:
                     )
                 item.name = name
                 session.commit()
+                cache.invalidate(ITEMS_TAG, f"item:{item_id}")
                 return {"id": item.id, "name": item.name}
         except SQLAlchemyError as e:
             session.rollback()
@@ -65,6 +86,7 @@ class ItemService:
                     )
                 session.delete(item)
                 session.commit()
+                cache.invalidate(ITEMS_TAG, f"item:{item_id}")
                 return {"message": "Item deleted successfully"}
         except SQLAlchemyError as e:
             session.rollback()
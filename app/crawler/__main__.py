@@ -0,0 +1,22 @@
+import os
+import signal
+
+from app.crawler.crawl_worker import CrawlWorker
+
+worker = CrawlWorker()
+
+
+def handle_signal(signum, _frame):
+    # The first signal lets the current symbols finish and hands the other
+    # leased tasks back, a second one exits right away and leaves the leases
+    # to expire
+    if worker.stop_event.is_set():
+        os._exit(128 + signum)
+    print(f"Received {signal.Signals(signum).name}, stopping the crawler worker...")
+    worker.stop()
+
+
+if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    worker.run()
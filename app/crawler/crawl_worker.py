@@ -0,0 +1,228 @@
+import threading
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.finances.crawl_model import CrawlTaskStatus
+from app.api.finances.finance_model import Finance, FinanceHistory
+from app.services.crawl_coordinator_service import CrawlCoordinator, LeaseHeartbeat
+from app.services.crawl_scheduler_service import CrawlScheduler
+from app.services.crawler_logger_service import CrawlerLogger
+from app.services.daily_change_service import DailyChangeJob
+from app.services.logger_service import LoggerService, request_id_var
+from app.services.metrics_service import timed_phase
+from app.services.selenium_service import SeleniumService
+from app.utils.api_consts import APIConfig, DailyChangeMode
+
+api_config = APIConfig()
+crawler_logger = CrawlerLogger("finance_crawler", identifier="finance")
+logger = LoggerService()
+
+
+class CrawlWorker:
+    """
+    Runs the crawl pipeline outside the web process. Every thread keeps its
+    own browser, leases tasks from the shared queue and stores each price as
+    soon as it is fetched, while the scheduler queues the tracked symbols.
+    """
+
+    def __init__(self, concurrency=None, poll_seconds=None):
+        self.concurrency = concurrency or api_config.crawler_concurrency
+        self.poll_seconds = poll_seconds or api_config.crawler_poll_seconds
+        self.coordinator = CrawlCoordinator()
+        self.scheduler = CrawlScheduler()
+        self.daily_change = DailyChangeJob()
+        self.daily_change_mode = api_config.daily_change_mode
+        self.dedup = api_config.crawl_dedup
+        self.dedup_tolerance = api_config.crawl_dedup_tolerance
+        self.stop_event = threading.Event()
+
+    def run(self):
+        # Blocks until stop() was called and every thread finished its symbol
+        logger.info(
+            f"Crawler worker {self.coordinator.node_id} started with "
+            f"{self.concurrency} threads",
+            route="INTERNAL/CrawlWorker",
+            func="run",
+        )
+        threads = [
+            threading.Thread(target=self._run_thread, name=f"CrawlWorker-{index}")
+            for index in range(self.concurrency)
+        ]
+        if self.daily_change_mode == DailyChangeMode.CLOSE.value:
+            threads.append(
+                threading.Thread(
+                    target=self.daily_change.run,
+                    args=(self.stop_event,),
+                    name="DailyChangeJob",
+                )
+            )
+        if api_config.crawl_scheduler_enabled:
+            threads.append(
+                threading.Thread(
+                    target=self.scheduler.run,
+                    args=(self.stop_event, self.poll_seconds),
+                    name="CrawlScheduler",
+                )
+            )
+        with LeaseHeartbeat(self.coordinator):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        # Tasks leased but not started yet go back to the queue right away
+        self.coordinator.release_tasks()
+        logger.info(
+            f"Crawler worker {self.coordinator.node_id} stopped",
+            route="INTERNAL/CrawlWorker",
+            func="run",
+        )
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run_thread(self):
+        selenium_service = None
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    tasks = self.coordinator.claim_tasks()
+                    claimed_at = time.perf_counter()
+                    for task in tasks:
+                        if self.stop_event.is_set():
+                            break
+                        selenium_service = self._run_task(
+                            selenium_service, task, claimed_at
+                        )
+                    if tasks and self.daily_change_mode == DailyChangeMode.BATCH.value:
+                        self._compute_daily_changes()
+                except SQLAlchemyError as e:
+                    # Tasks left leased are picked up again once they expire
+                    logger.error(
+                        f"Crawl queue unavailable: {e}",
+                        route="INTERNAL/CrawlWorker",
+                        func="_run_thread",
+                    )
+                    tasks = []
+                if not tasks:
+                    self.stop_event.wait(self.poll_seconds)
+        finally:
+            if selenium_service is not None:
+                selenium_service.close()
+
+    def _compute_daily_changes(self):
+        # Only finances with prices newer than their last computation are
+        # updated, a batch of other workers' symbols costs a single query
+        try:
+            self.daily_change.compute()
+        except SQLAlchemyError as e:
+            logger.error(
+                f"Failed to compute the daily change: {e}",
+                route="INTERNAL/CrawlWorker",
+                func="_compute_daily_changes",
+            )
+
+    def _run_task(self, selenium_service, task, claimed_at):
+        # Returns the browser to use for the next task, None when this one
+        # left it in an unknown state. Logs carry the id of the API request
+        # that queued the crawl, scheduled tasks have none.
+        token = request_id_var.set(task["request_id"])
+        try:
+            return self._fetch_and_store(selenium_service, task, claimed_at)
+        finally:
+            request_id_var.reset(token)
+
+    def _fetch_and_store(self, selenium_service, task, claimed_at):
+        symbol = task["symbol"]
+        # Tasks of a batch also wait for the ones fetched before them
+        timings = {
+            "queue_wait": task["queue_wait_seconds"]
+            + time.perf_counter()
+            - claimed_at
+        }
+        try:
+            with timed_phase(timings, "driver"):
+                if selenium_service is None:
+                    selenium_service = SeleniumService()
+            result = selenium_service.fetch_stock_price(symbol, timings=timings)
+        except Exception as e:
+            crawler_logger.error(f"Unexpected error: {e}", sub_identifier=symbol)
+            if selenium_service is not None:
+                selenium_service.close()
+            selenium_service = None
+            result = None
+
+        try:
+            if result is None:
+                raise RuntimeError(f"Failed to fetch {symbol}")
+            self._store_result(task, result, timings)
+        except Exception as e:
+            status = self.coordinator.fail_task(task["id"], e, timings)
+            if status == CrawlTaskStatus.DEAD.value:
+                logger.error(
+                    f"Giving up on {symbol} after {task['attempts']} attempts: {e}",
+                    route="INTERNAL/CrawlWorker",
+                    func="_run_task",
+                )
+        return selenium_service
+
+    def _store_result(self, task, result, timings):
+        def persist(session):
+            finance_id = session.execute(
+                select(Finance.id).where(Finance.symbol == task["symbol"])
+            ).scalar()
+            # The finance may have been deleted since the crawl was planned
+            if finance_id is None:
+                return
+
+            # Strip "$" sign from the price
+            current_price = float(result["price"][1:])
+            if self.dedup and self._extend_last_price(
+                session, finance_id, current_price, result["timestamp"]
+            ):
+                return
+
+            session.add(
+                FinanceHistory(
+                    finance_id=finance_id,
+                    current_price=current_price,
+                    created_at=result["timestamp"],
+                )
+            )
+
+        # The history is written in the transaction that completes the task,
+        # a task taken over by another node is never stored twice. The web
+        # processes pick the new row up for live streams and their caches.
+        if not self.coordinator.complete_task(task["id"], persist, timings):
+            logger.warning(
+                f"Lease on crawl task {task['id']} ({task['symbol']}) lost, "
+                "dropping its result",
+                route="INTERNAL/CrawlWorker",
+                func="_store_result",
+            )
+
+    def _extend_last_price(self, session, finance_id, current_price, seen_at):
+        # Moves last_seen_at of the last stored price when the new one is
+        # within the tolerance of it, returns False when a row is needed
+        last = session.execute(
+            select(FinanceHistory.created_at, FinanceHistory.current_price)
+            .where(FinanceHistory.finance_id == finance_id)
+            .order_by(FinanceHistory.created_at.desc())
+            .limit(1)
+        ).first()
+        if last is None:
+            return False
+        if abs(current_price - last.current_price) > self.dedup_tolerance:
+            return False
+
+        session.execute(
+            update(FinanceHistory)
+            .where(
+                FinanceHistory.finance_id == finance_id,
+                FinanceHistory.created_at == last.created_at,
+            )
+            .values(last_seen_at=seen_at)
+        )
+        return True
@@ -1,14 +1,110 @@
-from flask import Blueprint
+from flask import Blueprint, Response, jsonify, request
 from app.api.items.item_controller import item_bp
 from app.api.finances.finance_controller import finance_bp
+from app.services.admission_service import AdmissionController
+from app.services.cache_service import CacheService
+from app.services.log_writer_service import LogWriter
+from app.services.metrics_service import MetricsService
+from app.services.profiler_service import ProfilerService
+from app.utils.api_exceptions import APIError, APIWarn
 
 # Create the blueprint
 api_bp = Blueprint("api", __name__)
 api_bp.register_blueprint(item_bp, url_prefix="/items")
 api_bp.register_blueprint(finance_bp, url_prefix="/finances")
 
+admission_controller = AdmissionController()
+metrics = MetricsService()
+
+
+def _cache_counters():
+    stats = CacheService().stats()
+    return {
+        (("result", name),): stats[name]
+        for name in ("hits", "misses", "evictions", "invalidations", "errors")
+    }
+
+
+def _admission_rejections():
+    stats = admission_controller.stats()
+    return {
+        (("reason", "rate_limited"),): stats["rate_limited"],
+        (("reason", "shed"),): stats["shed"],
+    }
+
+
+def _log_records_dropped():
+    return LogWriter().stats()["dropped"]
+
+
+metrics.register_callback(
+    "cache_operations_total",
+    _cache_counters,
+    metric_type="counter",
+    help_text="Cache lookups and maintenance operations by result",
+)
+metrics.register_callback(
+    "admission_rejections_total",
+    _admission_rejections,
+    metric_type="counter",
+    help_text="Requests rejected by admission control",
+)
+metrics.register_callback(
+    "log_records_dropped_total",
+    _log_records_dropped,
+    metric_type="counter",
+    help_text="Log records dropped because the log queue was full",
+)
+
+
+@api_bp.before_request
+def admit_request():
+    admission_controller.admit()
+
+
+@api_bp.after_request
+def record_request_latency(response):
+    admission_controller.record_latency()
+    return response
+
+
+# Teardown of a streamed response runs once its body was sent
+@api_bp.teardown_request
+def release_request(_error):
+    admission_controller.release()
+
 
 # Define routes for the blueprint
 @api_bp.route("/healthz")
 def healthz():
     return "OK"
+
+
+@api_bp.route("/cache/stats")
+def cache_stats():
+    return jsonify(CacheService().stats())
+
+
+@api_bp.route("/metrics")
+def metrics_text():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@api_bp.route("/admin/profiles")
+def list_profiles():
+    profiler = ProfilerService()
+    # VALIDATION
+    if not profiler.enabled:
+        raise APIWarn(
+            "Resource not found", f"404 Not Found: {request.path}", status_code=404
+        )
+    if not profiler.is_authorized():
+        raise APIError(
+            "Forbidden", "Missing or invalid profile token for /admin/profiles", 403
+        )
+    limit = request.args.get("limit", default=10, type=int)
+    top = request.args.get("top", default=15, type=int)
+    # SERVICE
+    profiles = profiler.list_profiles(limit, top)
+    # RESPONSE
+    return jsonify(profiles)
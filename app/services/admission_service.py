@@ -0,0 +1,202 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, request
+
+from app.utils.api_consts import APIConfig
+from app.utils.api_exceptions import APIWarn
+
+api_config = APIConfig()
+
+# Endpoints that bypass admission control entirely. The price stream is
+# long-lived and bounded by its own subscriber limit.
+EXEMPT_ENDPOINTS = {
+    "api.healthz",
+    "api.cache_stats",
+    "api.metrics_text",
+    "api.finance.stream_finance_prices",
+}
+
+# Per-endpoint concurrency limits, everything else uses the configured default
+ROUTE_CONCURRENCY_LIMITS = {
+    "api.finance.execute_finance_crawl": 1,
+}
+
+# Upper bound on the number of clients tracked by the rate limiter
+MAX_TRACKED_CLIENTS = 10000
+
+# Weight of the newest sample in the per-route latency average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class _RouteState:
+    def __init__(self, limit):
+        self.limit = limit
+        self.slots = threading.BoundedSemaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency_ms = 0.0
+
+
+class AdmissionController:
+    """
+    Admission control for the API blueprint: per-client token buckets,
+    per-route concurrency limits with a bounded wait queue, and latency based
+    load shedding. Rejections are fast 429/503 responses with Retry-After.
+    """
+
+    _instance = None  # Singleton instance
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "_routes"):  # Avoid reinitializing the controller
+            return
+
+        self.enabled = api_config.admission_enabled
+        self.max_concurrency = api_config.admission_max_concurrency
+        self.max_queue = api_config.admission_max_queue
+        self.queue_timeout_seconds = api_config.admission_queue_timeout_ms / 1000
+        self.latency_target_ms = api_config.admission_latency_target_ms
+        self.rate_per_second = api_config.admission_rate_per_second
+        self.burst = api_config.admission_burst
+
+        self._routes = {}
+        self._buckets = OrderedDict()  # client -> (tokens, updated_at)
+        self._state_lock = threading.Lock()
+
+        self.rate_limited = 0
+        self.shed = 0
+
+    def _get_route(self, endpoint):
+        route = self._routes.get(endpoint)
+        if route is None:
+            with self._state_lock:
+                route = self._routes.setdefault(
+                    endpoint,
+                    _RouteState(
+                        ROUTE_CONCURRENCY_LIMITS.get(endpoint, self.max_concurrency)
+                    ),
+                )
+        return route
+
+    def _take_token(self, client):
+        # Returns 0 when admitted, otherwise the seconds until a token is free
+        if self.rate_per_second <= 0:
+            return 0
+
+        now = time.monotonic()
+        with self._state_lock:
+            tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate_per_second)
+            wait_seconds = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait_seconds = (1 - tokens) / self.rate_per_second
+
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+            return wait_seconds
+
+    def _reject(self, status_code, message, retry_after_seconds):
+        with self._state_lock:
+            if status_code == 429:
+                self.rate_limited += 1
+            else:
+                self.shed += 1
+        raise APIWarn(
+            "Too many requests" if status_code == 429 else "Service overloaded",
+            f"{status_code} {message}: {request.path}",
+            status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after_seconds)))},
+        )
+
+    def admit(self):
+        endpoint = request.endpoint
+        if not self.enabled or endpoint is None or endpoint in EXEMPT_ENDPOINTS:
+            return
+
+        wait_seconds = self._take_token(request.remote_addr)
+        if wait_seconds:
+            self._reject(429, "Rate limit exceeded", wait_seconds)
+
+        route = self._get_route(endpoint)
+        retry_after_seconds = max(route.latency_ms / 1000, 1)
+
+        # Above the latency target only a single probe request is let through
+        if route.latency_ms > self.latency_target_ms and route.in_flight > 0:
+            self._reject(503, "Latency target exceeded", retry_after_seconds)
+
+        if not route.slots.acquire(blocking=False):
+            with self._state_lock:
+                if route.waiting >= self.max_queue:
+                    queue_full = True
+                else:
+                    queue_full = False
+                    route.waiting += 1
+            if queue_full:
+                self._reject(503, "Admission queue full", retry_after_seconds)
+
+            try:
+                acquired = route.slots.acquire(timeout=self.queue_timeout_seconds)
+            finally:
+                with self._state_lock:
+                    route.waiting -= 1
+            if not acquired:
+                self._reject(503, "Admission queue timeout", retry_after_seconds)
+
+        with self._state_lock:
+            route.in_flight += 1
+        g.admission_route = route
+        g.admission_started_at = time.perf_counter()
+
+    def record_latency(self):
+        # Time until the response was built, the body of a streamed response
+        # is sent later and does not count towards the latency target
+        route = g.get("admission_route")
+        started_at = g.pop("admission_started_at", None)
+        if route is None or started_at is None:
+            return
+
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        with self._state_lock:
+            route.latency_ms += LATENCY_EWMA_ALPHA * (latency_ms - route.latency_ms)
+
+    def release(self):
+        # Runs once the body was sent, a streamed export keeps its slot until
+        # its last SQLite read
+        self.record_latency()
+        route = g.pop("admission_route", None)
+        if route is None:
+            return
+
+        with self._state_lock:
+            route.in_flight -= 1
+        route.slots.release()
+
+    def stats(self):
+        with self._state_lock:
+            return {
+                "rate_limited": self.rate_limited,
+                "shed": self.shed,
+                "routes": {
+                    endpoint: {
+                        "limit": route.limit,
+                        "in_flight": route.in_flight,
+                        "waiting": route.waiting,
+                        "latency_ms": round(route.latency_ms, 2),
+                    }
+                    for endpoint, route in self._routes.items()
+                },
+            }
@@ -0,0 +1,427 @@
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+from app.services.logger_service import LoggerService
+from app.utils.api_consts import APIConfig, CacheBackend
+
+api_config = APIConfig()
+logger = LoggerService()
+
+_MISSING = object()
+
+
+class MemoryCacheBackend:
+    """
+    Per-process TTL + LRU store.
+    """
+
+    def __init__(self, ttl_seconds, max_entries):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        # key -> (expires_at, tags, tag_versions, value), oldest first
+        self._entries = OrderedDict()
+        self._tag_versions = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get_tag_versions(self, tags):
+        return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+
+            expires_at, tags, tag_versions, value = entry
+            if expires_at <= time.monotonic() or tag_versions != self._get_tag_versions(
+                tags
+            ):
+                del self._entries[key]
+                return _MISSING
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags, generation=None):
+        # Returns the number of evicted entries
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return 0
+
+            self._entries[key] = (
+                time.monotonic() + self.ttl_seconds,
+                tags,
+                self._get_tag_versions(tags),
+                value,
+            )
+            self._entries.move_to_end(key)
+
+            evictions = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evictions += 1
+            return evictions
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+            self._generation += 1
+
+    def generation(self):
+        return self._generation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Host-wide TTL + LRU store shared by every worker process through a local
+    SQLite file in WAL mode. Tag versions and the invalidation generation live
+    in the same file, so an invalidation in one worker is seen by all of them.
+    """
+
+    # Recency is only rewritten when older than this, to keep hits read-only
+    TOUCH_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, ttl_seconds, max_entries, path):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at "
+                "ON cache_entries (accessed_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tags "
+                "(tag TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_meta "
+                "(name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('generation', 0)"
+            )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode, transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        # Take the write lock up front so read-modify-write is atomic
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _serialize_key(key):
+        return repr(key)
+
+    @staticmethod
+    def _get_tag_versions(conn, tags):
+        if not tags:
+            return ()
+        rows = dict(
+            conn.execute(
+                f"SELECT tag, version FROM cache_tags WHERE tag IN ({', '.join('?' * len(tags))})",
+                tags,
+            ).fetchall()
+        )
+        return tuple(rows.get(tag, 0) for tag in tags)
+
+    def get(self, key):
+        conn = self._connection()
+        key = self._serialize_key(key)
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return _MISSING
+
+        blob, expires_at, accessed_at = row
+        tags, tag_versions, value = pickle.loads(blob)
+        now = time.time()
+        if expires_at <= now or tag_versions != self._get_tag_versions(conn, tags):
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            return _MISSING
+
+        if now - accessed_at > self.TOUCH_INTERVAL_SECONDS:
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return value
+
+    def set(self, key, value, tags, generation=None):
+        with self._transaction() as conn:
+            if generation is not None and generation != self._get_generation(conn):
+                return 0
+
+            now = time.time()
+            blob = pickle.dumps(
+                (tags, self._get_tag_versions(conn, tags), value),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self._serialize_key(key), blob, now + self.ttl_seconds, now),
+            )
+
+            # Expired entries go first, then the least recently used ones
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (now,))
+            (size,) = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+            overflow = size - self.max_entries
+            if overflow <= 0:
+                return 0
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN "
+                "(SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            return overflow
+
+    def invalidate(self, tags):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO cache_tags (tag, version) VALUES (?, 1) "
+                "ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+                [(tag,) for tag in tags],
+            )
+            conn.execute(
+                "UPDATE cache_meta SET value = value + 1 WHERE name = 'generation'"
+            )
+
+    @staticmethod
+    def _get_generation(conn):
+        (generation,) = conn.execute(
+            "SELECT value FROM cache_meta WHERE name = 'generation'"
+        ).fetchone()
+        return generation
+
+    def generation(self):
+        return self._get_generation(self._connection())
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute(
+                "UPDATE cache_meta SET value = value + 1 WHERE name = 'generation'"
+            )
+
+    def size(self):
+        (size,) = (
+            self._connection().execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        )
+        return size
+
+
+class CacheService:
+    """
+    Read-through cache with TTL + LRU eviction in front of the services.
+
+    Entries are keyed by (namespace, args, kwargs) and carry a set of tags.
+    Invalidating a tag bumps its version, which turns every entry stored under
+    an older version into a miss on its next read. The store is either
+    per-process memory or a SQLite file shared by all workers on the host.
+    """
+
+    _instance = None  # Singleton instance
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "backend"):  # Avoid reinitializing the cache
+            return
+
+        self.ttl_seconds = api_config.cache_ttl_seconds
+        self.max_entries = api_config.cache_max_entries
+
+        if api_config.cache_backend == CacheBackend.SQLITE.value:
+            self.backend = SQLiteCacheBackend(
+                self.ttl_seconds, self.max_entries, api_config.cache_sqlite_path
+            )
+        else:
+            self.backend = MemoryCacheBackend(self.ttl_seconds, self.max_entries)
+
+        # Counters are per process, even with a shared backend
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _on_backend_error(self, error, func):
+        # A broken cache must never fail the request, fall back to the source
+        self._count("errors")
+        logger.warning(
+            f"Cache backend error: {error}", route="INTERNAL/CacheService", func=func
+        )
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except sqlite3.Error as e:
+            self._on_backend_error(e, "get")
+            value = _MISSING
+
+        self._count("misses" if value is _MISSING else "hits")
+        return value
+
+    def set(self, key, value, tags=(), generation=None):
+        try:
+            evictions = self.backend.set(key, value, tuple(tags), generation)
+        except sqlite3.Error as e:
+            self._on_backend_error(e, "set")
+            return
+        if evictions:
+            self._count("evictions", evictions)
+
+    def invalidate(self, *tags):
+        try:
+            self.backend.invalidate(tags)
+        except sqlite3.Error as e:
+            self._on_backend_error(e, "invalidate")
+            return
+        self._count("invalidations")
+
+    def generation(self):
+        try:
+            return self.backend.generation()
+        except sqlite3.Error as e:
+            self._on_backend_error(e, "generation")
+            return None
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = {
+                "backend": api_config.cache_backend,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+        try:
+            stats["size"] = self.backend.size()
+        except sqlite3.Error:
+            stats["size"] = None
+        return stats
+
+    def _store(self, key, value, tags, generation):
+        # Results computed across an invalidation are not stored
+        if generation is not None:
+            self.set(
+                key,
+                value,
+                tags(value) if callable(tags) else tags,
+                generation=generation,
+            )
+
+    def cached(self, namespace, tags=()):
+        # Decorator for service methods. `tags` is either an iterable or a
+        # callable receiving the method result. Cached results are shared
+        # between callers and must be treated as read-only. Coroutine methods
+        # get an async wrapper, sync and async services using the same
+        # namespace share their entries.
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+
+                @wraps(func)
+                async def async_wrapper(instance, *args, **kwargs):
+                    if not self.enabled:
+                        return await func(instance, *args, **kwargs)
+
+                    key = (namespace, args, tuple(sorted(kwargs.items())))
+                    value = self.get(key)
+                    if value is not _MISSING:
+                        return value
+
+                    generation = self.generation()
+                    value = await func(instance, *args, **kwargs)
+                    self._store(key, value, tags, generation)
+                    return value
+
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(instance, *args, **kwargs):
+                if not self.enabled:
+                    return func(instance, *args, **kwargs)
+
+                key = (namespace, args, tuple(sorted(kwargs.items())))
+                value = self.get(key)
+                if value is not _MISSING:
+                    return value
+
+                generation = self.generation()
+                value = func(instance, *args, **kwargs)
+                self._store(key, value, tags, generation)
+                return value
+
+            return wrapper
+
+        return decorator
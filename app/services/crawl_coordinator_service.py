@@ -0,0 +1,477 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import aliased
+
+from app.api.finances.crawl_model import (
+    CRAWL_TASK_PHASES,
+    Crawl,
+    CrawlStatus,
+    CrawlTask,
+    CrawlTaskStatus,
+)
+from app.services.logger_service import LoggerService
+from app.services.metrics_service import timed_phase
+from app.utils.api_consts import APIConfig
+from db.db import Database
+
+api_config = APIConfig()
+logger = LoggerService()
+
+# Upper bound of the exponential retry backoff
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+OPEN_TASK_STATUSES = (CrawlTaskStatus.PENDING.value, CrawlTaskStatus.LEASED.value)
+FINISHED_TASK_STATUSES = (CrawlTaskStatus.DONE.value, CrawlTaskStatus.DEAD.value)
+
+# Phase histogram buckets in seconds, a queue wait can take minutes
+PHASE_BUCKETS = (
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    1800.0,
+)
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class CrawlCoordinator:
+    """
+    Durable crawl work queue shared by every node through the database. A
+    crawl is one task per symbol, nodes lease tasks and keep the leases alive
+    with heartbeats. A task becomes visible again when its lease expires, a
+    failed one after a backoff, until it runs out of attempts and is dead.
+    """
+
+    def __init__(
+        self,
+        session_factory=None,
+        batch_size=None,
+        lease_seconds=None,
+        max_attempts=None,
+        retry_backoff_seconds=None,
+    ):
+        self.session_factory = session_factory or Database().session_local
+        self.batch_size = batch_size or api_config.crawl_batch_size
+        self.lease = timedelta(
+            seconds=lease_seconds or api_config.crawl_lease_seconds
+        )
+        self.max_attempts = max_attempts or api_config.crawl_max_attempts
+        self.retry_backoff = timedelta(
+            seconds=retry_backoff_seconds or api_config.crawl_retry_backoff_seconds
+        )
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def plan_crawl(self, symbols, request_id=None):
+        # Returns (crawl_id, planned), planned is False when a crawl is
+        # already running, which is then returned instead of planning another
+        now = utcnow()
+        with self.session_factory() as session:
+            try:
+                # Inserting first takes the write lock before anything is read,
+                # the partial unique index rejects a second running crawl
+                crawl = Crawl(status=CrawlStatus.RUNNING.value, request_id=request_id)
+                session.add(crawl)
+                session.flush()
+                if symbols:
+                    session.execute(
+                        insert(CrawlTask),
+                        [
+                            {
+                                "crawl_id": crawl.id,
+                                "symbol": symbol,
+                                "status": CrawlTaskStatus.PENDING.value,
+                                "visible_at": now,
+                                "created_at": now,
+                            }
+                            for symbol in dict.fromkeys(symbols)
+                        ],
+                    )
+                else:
+                    crawl.status = CrawlStatus.COMPLETED.value
+                    crawl.completed_at = now
+                session.commit()
+                return crawl.id, True
+            except IntegrityError:
+                session.rollback()
+
+            crawl_id = session.execute(
+                select(Crawl.id).where(Crawl.status == CrawlStatus.RUNNING.value)
+            ).scalar()
+            return crawl_id, False
+
+    def get_running_crawl(self):
+        with self.session_factory() as session:
+            crawl = session.execute(
+                select(Crawl.id, Crawl.created_at).where(
+                    Crawl.status == CrawlStatus.RUNNING.value
+                )
+            ).first()
+            if crawl is None:
+                return None
+            return {"id": crawl.id, "created_at": crawl.created_at}
+
+    def get_crawl(self, crawl_id):
+        # The crawl with its task counts, the phase histograms of its finished
+        # tasks and the timings of every symbol, None when it does not exist
+        with self.session_factory() as session:
+            crawl = session.execute(
+                select(
+                    Crawl.id,
+                    Crawl.status,
+                    Crawl.request_id,
+                    Crawl.created_at,
+                    Crawl.completed_at,
+                ).where(Crawl.id == crawl_id)
+            ).first()
+            if crawl is None:
+                return None
+
+            tasks = session.execute(
+                select(
+                    CrawlTask.symbol,
+                    CrawlTask.status,
+                    CrawlTask.attempts,
+                    CrawlTask.last_error,
+                    *self._phase_columns(),
+                )
+                .where(CrawlTask.crawl_id == crawl_id)
+                .order_by(CrawlTask.id)
+            ).all()
+            histograms = self._phase_histograms(session, crawl_id)
+
+        task_counts = dict.fromkeys((status.value for status in CrawlTaskStatus), 0)
+        for task in tasks:
+            task_counts[task.status] += 1
+        return {
+            "id": crawl.id,
+            "status": crawl.status,
+            "request_id": crawl.request_id,
+            "created_at": crawl.created_at,
+            "completed_at": crawl.completed_at,
+            "tasks": task_counts,
+            "timings": histograms,
+            "symbols": [
+                {
+                    "symbol": task.symbol,
+                    "status": task.status,
+                    "attempts": task.attempts,
+                    "last_error": task.last_error,
+                    "timings": {
+                        phase: getattr(task, f"{phase}_seconds")
+                        for phase in CRAWL_TASK_PHASES
+                    },
+                }
+                for task in tasks
+            ],
+        }
+
+    def phase_histograms(self):
+        # Phase histograms over every finished task, scheduled ones included
+        with self.session_factory() as session:
+            return self._phase_histograms(session)
+
+    def count_open_tasks(self):
+        with self.session_factory() as session:
+            return session.execute(
+                select(func.count()).where(CrawlTask.status.in_(OPEN_TASK_STATUSES))
+            ).scalar()
+
+    def claim_tasks(self):
+        # Leases up to batch_size visible tasks in a single UPDATE, so two
+        # nodes can never hold the same task
+        now = utcnow()
+        candidate = aliased(CrawlTask)
+        next_tasks = (
+            select(candidate.id)
+            .where(self._claimable(candidate, now))
+            .order_by(candidate.visible_at, candidate.id)
+            .limit(self.batch_size)
+        )
+        statement = (
+            update(CrawlTask)
+            .where(CrawlTask.id.in_(next_tasks), self._claimable(CrawlTask, now))
+            .values(
+                status=CrawlTaskStatus.LEASED.value,
+                lease_owner=self.node_id,
+                visible_at=now + self.lease,
+                heartbeat_at=now,
+                attempts=CrawlTask.attempts + 1,
+                # The wait up to the claim, the worker adds its own share
+                queue_wait_seconds=(
+                    func.julianday(now) - func.julianday(CrawlTask.visible_at)
+                )
+                * 86400,
+            )
+            .returning(
+                CrawlTask.id,
+                CrawlTask.crawl_id,
+                CrawlTask.symbol,
+                CrawlTask.attempts,
+                CrawlTask.queue_wait_seconds,
+                # Id of the API request that queued the crawl, for the logs
+                select(Crawl.request_id)
+                .where(Crawl.id == CrawlTask.crawl_id)
+                .scalar_subquery()
+                .label("request_id"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        with self.session_factory() as session:
+            # Leases that expired on their last attempt are never claimed again
+            expired = session.execute(
+                update(CrawlTask)
+                .where(
+                    CrawlTask.status == CrawlTaskStatus.LEASED.value,
+                    CrawlTask.visible_at <= now,
+                    CrawlTask.attempts >= self.max_attempts,
+                )
+                .values(
+                    status=CrawlTaskStatus.DEAD.value,
+                    lease_owner=None,
+                    last_error="Lease expired on the last attempt",
+                    completed_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if expired.rowcount:
+                self._finish_crawls(session, now)
+
+            tasks = session.execute(statement).all()
+            session.commit()
+
+        return [
+            {
+                "id": task.id,
+                "crawl_id": task.crawl_id,
+                "symbol": task.symbol,
+                "attempts": task.attempts,
+                "queue_wait_seconds": task.queue_wait_seconds,
+                "request_id": task.request_id,
+            }
+            for task in sorted(tasks, key=lambda task: task.id)
+        ]
+
+    def heartbeat(self):
+        # Extends every lease held by this node, returns how many are held
+        now = utcnow()
+        with self.session_factory() as session:
+            result = session.execute(
+                update(CrawlTask)
+                .where(
+                    CrawlTask.status == CrawlTaskStatus.LEASED.value,
+                    CrawlTask.lease_owner == self.node_id,
+                )
+                .values(heartbeat_at=now, visible_at=now + self.lease)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount
+
+    def complete_task(self, task_id, persist=None, timings=None):
+        # Calls persist(session) and marks the task done in the same
+        # transaction, nothing is written when the lease was lost in between.
+        # timings holds the seconds of each phase, persist is timed here.
+        now = utcnow()
+        timings = dict(timings or {})
+        with self.session_factory() as session:
+            if persist is not None:
+                with timed_phase(timings, "persist"):
+                    persist(session)
+                    session.flush()
+
+            result = session.execute(
+                self._update_owned(task_id).values(
+                    status=CrawlTaskStatus.DONE.value,
+                    last_error=None,
+                    completed_at=now,
+                    **self._timing_values(timings),
+                )
+            )
+            if result.rowcount != 1:
+                session.rollback()
+                return False
+
+            self._finish_crawls(session, now)
+            session.commit()
+            return True
+
+    def fail_task(self, task_id, error, timings=None):
+        # Schedules a retry after an exponential backoff, or moves the task to
+        # the dead letters once it ran out of attempts. Returns the new status,
+        # None when the lease was lost.
+        now = utcnow()
+        with self.session_factory() as session:
+            attempts = session.execute(
+                select(CrawlTask.attempts).where(
+                    CrawlTask.id == task_id,
+                    CrawlTask.status == CrawlTaskStatus.LEASED.value,
+                    CrawlTask.lease_owner == self.node_id,
+                )
+            ).scalar()
+            if attempts is None:
+                return None
+
+            if attempts >= self.max_attempts:
+                values = {
+                    "status": CrawlTaskStatus.DEAD.value,
+                    "completed_at": now,
+                }
+            else:
+                delay = min(self.retry_backoff * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+                values = {
+                    "status": CrawlTaskStatus.PENDING.value,
+                    "visible_at": now + delay,
+                }
+            result = session.execute(
+                self._update_owned(task_id).values(
+                    lease_owner=None,
+                    last_error=str(error),
+                    **values,
+                    **self._timing_values(timings or {}),
+                )
+            )
+            if result.rowcount != 1:
+                session.rollback()
+                return None
+
+            self._finish_crawls(session, now)
+            session.commit()
+            return values["status"]
+
+    def release_tasks(self):
+        # Hands every task leased by this node back right away instead of
+        # waiting for the leases to expire
+        with self.session_factory() as session:
+            session.execute(
+                update(CrawlTask)
+                .where(
+                    CrawlTask.status == CrawlTaskStatus.LEASED.value,
+                    CrawlTask.lease_owner == self.node_id,
+                )
+                .values(
+                    status=CrawlTaskStatus.PENDING.value,
+                    lease_owner=None,
+                    visible_at=utcnow(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+
+    def _update_owned(self, task_id):
+        return (
+            update(CrawlTask)
+            .where(
+                CrawlTask.id == task_id,
+                CrawlTask.status == CrawlTaskStatus.LEASED.value,
+                CrawlTask.lease_owner == self.node_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _phase_columns():
+        return [getattr(CrawlTask, f"{phase}_seconds") for phase in CRAWL_TASK_PHASES]
+
+    @staticmethod
+    def _timing_values(timings):
+        # Phases missing from timings, e.g. after a failed launch, are cleared
+        return {f"{phase}_seconds": timings.get(phase) for phase in CRAWL_TASK_PHASES}
+
+    def _phase_histograms(self, session, crawl_id=None):
+        # Aggregated by the database in a single scan, every bucket counts the
+        # tasks at or below its bound. Shaped like the metrics histograms.
+        aggregates = []
+        for column in self._phase_columns():
+            aggregates += [
+                func.count(case((column <= bound, 1))) for bound in PHASE_BUCKETS
+            ]
+            aggregates += [func.count(column), func.coalesce(func.sum(column), 0.0)]
+
+        statement = select(*aggregates).where(
+            CrawlTask.status.in_(FINISHED_TASK_STATUSES)
+        )
+        if crawl_id is not None:
+            statement = statement.where(CrawlTask.crawl_id == crawl_id)
+        values = iter(session.execute(statement).one())
+
+        histograms = {}
+        for phase in CRAWL_TASK_PHASES:
+            buckets = {str(bound): next(values) for bound in PHASE_BUCKETS}
+            count = buckets["+Inf"] = next(values)
+            histograms[phase] = {
+                "buckets": buckets,
+                "sum": next(values),
+                "count": count,
+            }
+        return histograms
+
+    @staticmethod
+    def _finish_crawls(session, now):
+        # A crawl completes once none of its tasks are pending or leased
+        open_tasks = exists().where(
+            CrawlTask.crawl_id == Crawl.id,
+            CrawlTask.status.in_(OPEN_TASK_STATUSES),
+        )
+        session.execute(
+            update(Crawl)
+            .where(Crawl.status == CrawlStatus.RUNNING.value, ~open_tasks)
+            .values(status=CrawlStatus.COMPLETED.value, completed_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _claimable(self, task, now):
+        return (
+            task.status.in_(OPEN_TASK_STATUSES)
+            & (task.visible_at <= now)
+            & (task.attempts < self.max_attempts)
+        )
+
+
+class LeaseHeartbeat:
+    """
+    Renews the leases of a node in the background while it works on them.
+    """
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self.interval = coordinator.lease.total_seconds() / 3
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.coordinator.heartbeat()
+            except SQLAlchemyError as e:
+                # Retried on the next beat, the lease outlives two missed ones
+                logger.warning(
+                    f"Heartbeat failed for node {self.coordinator.node_id}: {e}",
+                    route="INTERNAL/LeaseHeartbeat",
+                    func="_run",
+                )
@@ -0,0 +1,147 @@
+import random
+from datetime import timedelta
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.finances.crawl_model import CrawlTask, CrawlTaskStatus
+from app.api.finances.finance_model import Finance
+from app.services.crawl_coordinator_service import OPEN_TASK_STATUSES, utcnow
+from app.services.logger_service import LoggerService
+from app.utils.api_consts import APIConfig
+from app.utils.api_market import is_market_open, next_market_open
+from db.db import Database
+
+api_config = APIConfig()
+logger = LoggerService()
+
+
+class CrawlScheduler:
+    """
+    Queues the tracked symbols for the crawler workers, each on its own
+    interval. First runs are spread over a whole interval and every later one
+    is jittered, so symbols do not all come due at once. Outside market hours
+    the intervals are stretched, but never past the next market open.
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or Database().session_local
+        self.default_interval = api_config.crawl_interval_seconds
+        self.jitter = min(api_config.crawl_interval_jitter, 1)
+        self.off_hours_multiplier = api_config.crawl_off_hours_multiplier
+
+    def next_crawl_at(self, interval_seconds, now, first=False):
+        # A first run lands anywhere within one interval, later ones one
+        # interval away give or take the jitter
+        interval = interval_seconds or self.default_interval
+        market_open = is_market_open(now)
+        if not market_open:
+            interval *= self.off_hours_multiplier
+
+        if first:
+            delay = random.uniform(0, interval)
+        else:
+            delay = interval * (1 + random.uniform(-self.jitter, self.jitter))
+        next_crawl_at = now + timedelta(seconds=delay)
+
+        if not market_open:
+            # Back on the regular cadence right after the open, spread over
+            # one regular interval
+            opens_at = next_market_open(now)
+            if next_crawl_at > opens_at:
+                next_crawl_at = opens_at + timedelta(
+                    seconds=random.uniform(0, interval_seconds or self.default_interval)
+                )
+        return next_crawl_at
+
+    def schedule_due(self, now=None):
+        # Queues every tracked symbol that is due and returns the queued
+        # symbols. Safe to run on several workers at once, a due symbol is
+        # only moved to its next run by one of them.
+        now = now or utcnow()
+        with self.session_factory() as session:
+            due = session.execute(
+                select(
+                    Finance.id,
+                    Finance.symbol,
+                    Finance.crawl_interval_seconds,
+                    Finance.next_crawl_at,
+                )
+                .where(
+                    Finance.is_tracking.is_(True),
+                    or_(Finance.next_crawl_at.is_(None), Finance.next_crawl_at <= now),
+                )
+                .order_by(Finance.next_crawl_at)
+            ).all()
+            if not due:
+                return []
+
+            symbols = []
+            for finance in due:
+                first = finance.next_crawl_at is None
+                claimed = session.execute(
+                    update(Finance)
+                    .where(
+                        Finance.id == finance.id,
+                        or_(
+                            Finance.next_crawl_at.is_(None),
+                            Finance.next_crawl_at <= now,
+                        ),
+                    )
+                    .values(
+                        next_crawl_at=self.next_crawl_at(
+                            finance.crawl_interval_seconds, now, first
+                        ),
+                        # Scheduling is not a change of the finance
+                        updated_at=Finance.updated_at,
+                    )
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                # A symbol seen for the first time only gets its start time
+                if claimed and not first:
+                    symbols.append(finance.symbol)
+
+            # A symbol still waiting from its last run is not queued twice
+            queued = set(
+                session.execute(
+                    select(CrawlTask.symbol).where(
+                        CrawlTask.symbol.in_(symbols),
+                        CrawlTask.status.in_(OPEN_TASK_STATUSES),
+                    )
+                ).scalars()
+            )
+            symbols = [symbol for symbol in symbols if symbol not in queued]
+            if symbols:
+                session.execute(
+                    insert(CrawlTask),
+                    [
+                        {
+                            "crawl_id": None,
+                            "symbol": symbol,
+                            "status": CrawlTaskStatus.PENDING.value,
+                            "visible_at": now,
+                            "created_at": now,
+                        }
+                        for symbol in symbols
+                    ],
+                )
+            session.commit()
+            return symbols
+
+    def run(self, stop_event, tick_seconds):
+        while not stop_event.is_set():
+            try:
+                symbols = self.schedule_due()
+                if symbols:
+                    logger.debug(
+                        f"Scheduled {len(symbols)} symbols",
+                        route="INTERNAL/CrawlScheduler",
+                        func="run",
+                    )
+            except SQLAlchemyError as e:
+                logger.error(
+                    f"Failed to schedule crawl tasks: {e}",
+                    route="INTERNAL/CrawlScheduler",
+                    func="run",
+                )
+            stop_event.wait(tick_seconds)
@@ -1,9 +1,30 @@
 import logging
 import os
-from datetime import datetime
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from app.services.log_writer_service import (
+    BatchedFileHandler,
+    BatchedStreamHandler,
+    JSONFormatter,
+    LogFormat,
+    LogWriter,
+    QueuedHandler,
+)
+from app.services.logger_service import request_id_var
+from app.utils.api_consts import APIConfig
+
+api_config = APIConfig()
 
 
 class CrawlerLogger:
+    """
+    Logger for the crawler, writing one date-based log file per
+    sub-identifier (usually a symbol). File handlers are kept open in an LRU
+    cache bounded by LOG_MAX_OPEN_FILES and rotated when the date changes.
+    """
+
     _instance = None  # Singleton instance
 
     def __new__(cls, *args, **kwargs):
@@ -14,71 +35,97 @@ class CrawlerLogger:
     def __init__(self, name="CrawlerLogger", identifier=None, sub_identifier="Default"):
         if not hasattr(self, "logger"):  # Avoid reinitializing the logger
             self.logger = logging.getLogger(name)
-            self.logger.setLevel(logging.DEBUG)
+            self.logger.setLevel(api_config.log_level)
 
             # If identifier is None, set a default identifier
             self.identifier = (
                 identifier if identifier is not None else "default_identifier"
             )
             self.sub_identifier = sub_identifier
-
-            # Ensure the logs directory exists
-            log_dir = f"./crawl/{self.identifier}/{self.sub_identifier}"
-            os.makedirs(log_dir, exist_ok=True)
-
-            # Get today's date for the log file name
-            log_file = os.path.join(
-                log_dir, f"{datetime.now().strftime('%Y-%m-%d')}.log"
-            )
+            self.max_open_files = api_config.log_max_open_files
 
             # Log format for both file and console handlers (no colors)
-            formatter = logging.Formatter(
-                "%(asctime)s - %(levelname)s - %(identifier)s %(sub_identifier)s - %(log_message)s"
-            )
-
-            # File handler (write to date-based log file)
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setFormatter(formatter)
+            if api_config.log_format == LogFormat.JSON.value:
+                self.formatter = JSONFormatter(
+                    ("identifier", "sub_identifier", "request_id")
+                )
+            else:
+                self.formatter = logging.Formatter(
+                    "%(asctime)s - %(levelname)s - %(identifier)s %(sub_identifier)s - %(log_message)s - %(request_id)s"
+                )
 
             # Stream handler (no colors for console output)
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
+            self.console_handler = BatchedStreamHandler()
+            self.console_handler.setFormatter(self.formatter)
+
+            # sub_identifier -> (date, file handler), least recently used first
+            self._file_handlers = OrderedDict()
+            self._file_handlers_lock = threading.Lock()
+            self._date = None
+            self._rollover_at = 0
+
+            # Records are written by the shared background writer
+            self.logger.addHandler(QueuedHandler(LogWriter(), self._handlers_for))
+
+    def _current_date(self, now):
+        # The date string is only recomputed once the next midnight has passed
+        if now >= self._rollover_at:
+            today = datetime.fromtimestamp(now).date()
+            self._date = today.strftime("%Y-%m-%d")
+            self._rollover_at = datetime.combine(
+                today + timedelta(days=1), datetime.min.time()
+            ).timestamp()
+        return self._date
+
+    def _open_file_handler(self, sub_identifier, date):
+        log_dir = f"./crawl/{self.identifier}/{sub_identifier}"
+        os.makedirs(log_dir, exist_ok=True)  # Ensure the log directory exists
 
-            # Add handlers to logger
-            self.logger.addHandler(console_handler)
-            self.logger.addHandler(file_handler)
+        # File handler (write to date-based log file)
+        file_handler = BatchedFileHandler(os.path.join(log_dir, f"{date}.log"))
+        file_handler.setFormatter(self.formatter)
+        return file_handler
+
+    def _get_file_handler(self, sub_identifier, now):
+        with self._file_handlers_lock:
+            date = self._current_date(now)
+            entry = self._file_handlers.get(sub_identifier)
+            if entry is not None and entry[0] == date:
+                self._file_handlers.move_to_end(sub_identifier)
+                return entry[1]
+
+            # Runs on the writer thread, records queued before were written
+            if entry is not None:
+                entry[1].close()
+            file_handler = self._open_file_handler(sub_identifier, date)
+            self._file_handlers[sub_identifier] = (date, file_handler)
+            self._file_handlers.move_to_end(sub_identifier)
+            while len(self._file_handlers) > self.max_open_files:
+                _, (_, evicted_handler) = self._file_handlers.popitem(last=False)
+                evicted_handler.close()
+            return file_handler
+
+    def _handlers_for(self, record):
+        # Resolved on the writer thread, so files are opened off the crawler
+        return (
+            self.console_handler,
+            self._get_file_handler(record.sub_identifier, record.created),
+        )
 
     def set_sub_identifier(self, sub_identifier):
         # Ensure that sub_identifier is not None
         if sub_identifier is None:
             raise ValueError("sub_identifier cannot be None")
 
-        # Update the sub_identifier for the logger
+        # Default sub_identifier for lines logged without one
         self.sub_identifier = sub_identifier
 
-        log_dir = f"./crawl/{self.identifier}/{self.sub_identifier}"
-        os.makedirs(log_dir, exist_ok=True)  # Ensure the log directory exists
-
-        # Get today's date for the log file name
-        log_file = os.path.join(log_dir, f"{datetime.now().strftime('%Y-%m-%d')}.log")
-
-        # Remove old file handler if present (optional, based on your use case)
-        for handler in self.logger.handlers:
-            if isinstance(handler, logging.FileHandler):
-                self.logger.removeHandler(handler)
-
-        # File handler (write to date-based log file)
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s - %(levelname)s - %(identifier)s %(sub_identifier)s - %(log_message)s"
-            )
-        )
-        self.logger.addHandler(file_handler)
-
     def log(self, level, message, sub_identifier=None):
-        if sub_identifier is not None:
-            self.set_sub_identifier(sub_identifier)
+        if not self.logger.isEnabledFor(level):
+            return
+
+        if sub_identifier is None:
+            sub_identifier = self.sub_identifier
 
         if isinstance(message, list):
             message = " | ".join(map(str, message))  # Format list as a string
@@ -87,7 +134,8 @@ class CrawlerLogger:
         extra = {
             "log_message": message,  # Use 'log_message' instead of 'message'
             "identifier": self.identifier,  # Add identifier to extra fields
-            "sub_identifier": self.sub_identifier,  # Add sub_identifier to extra fields
+            "sub_identifier": sub_identifier,  # Add sub_identifier to extra fields
+            "request_id": request_id_var.get() or "INTERNAL",
         }
         self.logger.log(level, message, extra=extra)
 
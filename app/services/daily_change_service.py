@@ -0,0 +1,113 @@
+from sqlalchemy import exists, func, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
+
+from app.api.finances.finance_model import Finance, FinanceHistory
+from app.services.cache_service import CacheService
+from app.services.crawl_coordinator_service import utcnow
+from app.services.logger_service import LoggerService
+from app.utils.api_market import last_market_close, last_market_open, next_market_close
+from db.db import Database
+
+cache = CacheService()
+logger = LoggerService()
+
+
+def _latest_history(column, closed_at=None):
+    # Column of the newest history row of the finance being updated, up to
+    # closed_at when given. A seek on the (finance_id, ts_epoch_ms) key.
+    history = aliased(FinanceHistory)
+    statement = select(getattr(history, column)).where(
+        history.finance_id == Finance.id
+    )
+    if closed_at is not None:
+        statement = statement.where(history.created_at <= closed_at)
+    return (
+        statement.order_by(history.created_at.desc()).limit(1).scalar_subquery()
+    )
+
+
+class DailyChangeJob:
+    """
+    Computes the closing price and the daily change of every finance with new
+    prices in a single UPDATE. The closing price is the last one stored by the
+    close of the session before the current one, a finance without history
+    back then keeps the closing price set through the API.
+    """
+
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory or Database().session_local
+
+    def compute(self, now=None):
+        # Returns the symbols that were updated
+        now = now or utcnow()
+        closed_at = last_market_close(last_market_open(now))
+
+        has_new_prices = exists().where(
+            FinanceHistory.finance_id == Finance.id,
+            or_(
+                Finance.daily_change_as_of.is_(None),
+                FinanceHistory.created_at > Finance.daily_change_as_of,
+            ),
+        )
+        changes = (
+            select(
+                Finance.id.label("finance_id"),
+                _latest_history("current_price").label("current_price"),
+                _latest_history("created_at").label("as_of"),
+                func.coalesce(
+                    _latest_history("current_price", closed_at),
+                    Finance.last_closing_price,
+                ).label("closing_price"),
+            )
+            .where(has_new_prices)
+            .subquery("changes")
+        )
+        change_value = changes.c.current_price - changes.c.closing_price
+
+        with self.session_factory() as session:
+            updated = session.execute(
+                update(Finance)
+                .where(
+                    Finance.id == changes.c.finance_id,
+                    # Without a closing price the finance is tried again on
+                    # the next run, daily_change_as_of is left as it is
+                    changes.c.closing_price.is_not(None),
+                )
+                .values(
+                    last_closing_price=changes.c.closing_price,
+                    daily_change_value=change_value,
+                    # SQLite divides by a 0 closing price to NULL
+                    daily_change_percentage=change_value
+                    / changes.c.closing_price
+                    * 100,
+                    daily_change_as_of=changes.c.as_of,
+                )
+                .returning(Finance.id, Finance.symbol)
+                .execution_options(synchronize_session=False)
+            ).all()
+            session.commit()
+
+        if updated:
+            cache.invalidate(*(f"finance_id:{finance.id}" for finance in updated))
+        return [finance.symbol for finance in updated]
+
+    def run(self, stop_event):
+        # Computes once a day at the market close, until stop_event is set
+        while True:
+            now = utcnow()
+            if stop_event.wait((next_market_close(now) - now).total_seconds()):
+                return
+            try:
+                symbols = self.compute()
+                logger.info(
+                    f"Computed the daily change of {len(symbols)} finances",
+                    route="INTERNAL/DailyChangeJob",
+                    func="run",
+                )
+            except SQLAlchemyError as e:
+                logger.error(
+                    f"Failed to compute the daily change: {e}",
+                    route="INTERNAL/DailyChangeJob",
+                    func="run",
+                )
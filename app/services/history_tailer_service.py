@@ -0,0 +1,204 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import literal, or_, select, union_all
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api.finances.finance_model import EPOCH, Finance, FinanceHistory
+from app.services.cache_service import CacheService
+from app.services.logger_service import LoggerService
+from app.services.price_broker_service import PriceBroker
+from app.utils.api_consts import APIConfig, DailyChangeMode
+from db.db import Database
+
+api_config = APIConfig()
+cache = CacheService()
+logger = LoggerService()
+price_broker = PriceBroker()
+
+# Rows handled per poll, a backlog is worked off over the next polls
+TAIL_BATCH_SIZE = 1000
+
+# How long a new price waits for its daily change, cached finances expire
+# on their own past that
+DAILY_CHANGE_WAIT = timedelta(days=1)
+
+
+class HistoryTailer:
+    """
+    Follows finance_history for the prices stored by the crawler workers,
+    which run in their own processes. New rows invalidate the cached finance
+    and are published to the live price streams of this process. Started
+    with the app when the cache is enabled, otherwise with the first stream.
+    """
+
+    _instance = None  # Singleton instance
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "db"):  # Avoid reinitializing the tailer
+            return
+
+        self.db = Database()
+        self.poll_seconds = api_config.history_poll_seconds
+        # Workers commit prices out of time order across symbols, the rows
+        # within this window of the newest one are read again and the known
+        # ones skipped. A price is stored well within a lease of its fetch.
+        self.lookback = timedelta(seconds=api_config.crawl_lease_seconds)
+        self.since = datetime.now(timezone.utc) - self.lookback
+        # Rows at since are read from the ones past this finance on, 0 for all
+        self.since_finance_id = 0
+        self._published = set()  # (finance_id, seen_at) from since on
+        # Finances with prices newer than their daily change, the workers
+        # compute it after storing them. finance_id -> newest price time.
+        self.watch_daily_change = (
+            cache.enabled
+            and api_config.daily_change_mode != DailyChangeMode.OFF.value
+        )
+        self._pending_daily_change = {}
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def start(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="HistoryTailer", daemon=True
+                )
+                self._thread.start()
+
+    def poll(self):
+        # Returns the number of rows read, new ones and ones extended by
+        # CRAWL_DEDUP, whose last_seen_at is the time of the crawl
+        points = union_all(
+            self._select_points(FinanceHistory.created_at, is_new=True),
+            self._select_points(FinanceHistory.last_seen_at, is_new=False),
+        ).subquery("points")
+        with self.db.session_local() as session:
+            rows = session.execute(
+                select(points, Finance.symbol)
+                .join(Finance, Finance.id == points.c.finance_id)
+                .order_by(points.c.seen_at, points.c.finance_id)
+                .limit(TAIL_BATCH_SIZE)
+            ).all()
+            daily_changes = self._read_daily_changes(session)
+
+        # The cache may have been filled between the price and its daily change
+        if daily_changes:
+            cache.invalidate(
+                *(f"finance_id:{finance_id}" for finance_id in daily_changes)
+            )
+
+        if not rows:
+            return 0
+
+        new_rows = [
+            row for row in rows if (row.finance_id, row.seen_at) not in self._published
+        ]
+        # A full batch is a backlog, it is read on from its last row without
+        # looking back. Rows of other finances at the same time may have been
+        # cut off, the finance_id tells them apart.
+        if len(rows) == TAIL_BATCH_SIZE:
+            self.since = rows[-1].seen_at
+            self.since_finance_id = rows[-1].finance_id
+        elif rows[-1].seen_at - self.lookback > self.since:
+            self.since = rows[-1].seen_at - self.lookback
+            self.since_finance_id = 0
+        self._published = {
+            key
+            for key in self._published.union(
+                (row.finance_id, row.seen_at) for row in new_rows
+            )
+            if key[1] >= self.since
+        }
+
+        if new_rows:
+            cache.invalidate(*{f"finance_id:{row.finance_id}" for row in new_rows})
+        if self.watch_daily_change:
+            for row in new_rows:
+                if row.is_new:
+                    pending = self._pending_daily_change.get(row.finance_id)
+                    if pending is None or row.seen_at > pending:
+                        self._pending_daily_change[row.finance_id] = row.seen_at
+        for row in new_rows:
+            price_broker.publish(
+                row.symbol,
+                {
+                    "id": (row.seen_at - EPOCH) // timedelta(milliseconds=1),
+                    "symbol": row.symbol,
+                    "current_price": row.current_price,
+                    "created_at": row.seen_at,
+                },
+            )
+        return len(rows)
+
+    def _read_daily_changes(self, session):
+        # Returns the pending finances whose daily change caught up with
+        # their newest price, only those are read
+        if not self._pending_daily_change:
+            return []
+
+        given_up_at = datetime.now(timezone.utc) - DAILY_CHANGE_WAIT
+        for finance_id, seen_at in list(self._pending_daily_change.items()):
+            if seen_at < given_up_at:
+                del self._pending_daily_change[finance_id]
+        computed = [
+            finance_id
+            for finance_id, as_of in session.execute(
+                select(Finance.id, Finance.daily_change_as_of).where(
+                    Finance.id.in_(self._pending_daily_change)
+                )
+            )
+            if as_of is not None and as_of >= self._pending_daily_change[finance_id]
+        ]
+        for finance_id in computed:
+            del self._pending_daily_change[finance_id]
+        return computed
+
+    def _select_points(self, seen_at, is_new):
+        # The IN list makes SQLite seek the (finance_id, ts_epoch_ms) primary
+        # key of every finance instead of scanning the whole history. Points
+        # extended by CRAWL_DEDUP are not new prices.
+        return select(
+            FinanceHistory.finance_id,
+            FinanceHistory.current_price,
+            seen_at.label("seen_at"),
+            literal(is_new).label("is_new"),
+        ).where(
+            FinanceHistory.finance_id.in_(select(Finance.id)),
+            seen_at >= self.since,
+            or_(
+                seen_at > self.since,
+                FinanceHistory.finance_id > self.since_finance_id,
+            ),
+        )
+
+    def _run(self):
+        while True:
+            try:
+                # A full batch means there is more to catch up on
+                if self.poll() == TAIL_BATCH_SIZE:
+                    continue
+            except SQLAlchemyError as e:
+                logger.warning(
+                    f"Failed to read new finance history: {e}",
+                    route="INTERNAL/HistoryTailer",
+                    func="_run",
+                )
+            except Exception as e:
+                # The thread must outlive a failing publish or invalidation
+                logger.error(
+                    f"Failed to publish new finance history: {e}",
+                    route="INTERNAL/HistoryTailer",
+                    func="_run",
+                )
+            time.sleep(self.poll_seconds)
@@ -0,0 +1,211 @@
+import atexit
+import json
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from enum import Enum
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class LogQueuePolicy(Enum):
+    DROP = "drop"
+    BLOCK = "block"
+
+
+class LogFormat(Enum):
+    TEXT = "text"
+    JSON = "json"
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line with the timestamp, level, message and the given
+    record fields, for log shippers instead of terminals.
+    """
+
+    def __init__(self, fields):
+        super().__init__()
+        self.fields = fields
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": getattr(record, "log_message", record.msg),
+        }
+        for field in self.fields:
+            entry[field] = getattr(record, field, None)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, default=str)
+
+
+class _BatchFlushMixin:
+    # Flushed once per batch by the LogWriter instead of once per record
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchedFileHandler(_BatchFlushMixin, logging.FileHandler):
+    pass
+
+
+class BatchedStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    pass
+
+
+class QueuedHandler(logging.Handler):
+    """
+    Hands records to the shared LogWriter instead of writing them. A list of
+    target handlers is captured per record, a callable is called with the
+    record on the writer thread to resolve them.
+    """
+
+    def __init__(self, writer, handlers):
+        super().__init__()
+        self.writer = writer
+        self.handlers = handlers
+
+    @staticmethod
+    def prepare(record):
+        # Formatting happens later on the writer thread, resolve anything that
+        # could change or keep frames alive until then
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        handlers = self.handlers if callable(self.handlers) else tuple(self.handlers)
+        self.writer.enqueue(self.prepare(record), handlers)
+
+
+class LogWriter:
+    """
+    Background thread writing the records of every logger. The queue is
+    bounded, when it is full records are dropped or the caller blocks
+    depending on the policy. Each batch is flushed once per handler and the
+    queue is drained at interpreter exit.
+    """
+
+    _instance = None  # Singleton instance
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "_pending"):  # Avoid reinitializing the writer
+            return
+
+        # Defaults until APIConfig has loaded the environment
+        self.max_queue_size = 10000
+        self.policy = LogQueuePolicy.DROP.value
+        self.dropped = 0
+
+        self._pending = deque()
+        self._state_lock = threading.Lock()
+        self._not_empty = threading.Condition(self._state_lock)
+        self._not_full = threading.Condition(self._state_lock)
+        self._thread = None
+        self._stopped = False
+        atexit.register(self.stop)
+
+    def configure(self, max_queue_size, policy):
+        with self._state_lock:
+            self.max_queue_size = max_queue_size
+            self.policy = policy
+            self._not_full.notify_all()
+
+    def _ensure_started(self):
+        # Started lazily, which also restarts it in a forked worker process
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="LogWriter", daemon=True
+            )
+            self._thread.start()
+
+    def enqueue(self, record, handlers):
+        with self._state_lock:
+            while not self._stopped and len(self._pending) >= self.max_queue_size:
+                if self.policy == LogQueuePolicy.DROP.value:
+                    self.dropped += 1
+                    return
+                self._not_full.wait()
+
+            if self._stopped:
+                # Past shutdown there is no writer left, write in place
+                self._write([(record, handlers)])
+                return
+
+            self._ensure_started()
+            self._pending.append((record, handlers))
+            self._not_empty.notify()
+
+    def _run(self):
+        while True:
+            with self._state_lock:
+                while not self._pending and not self._stopped:
+                    self._not_empty.wait()
+                if not self._pending:
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+                self._not_full.notify_all()
+            self._write(batch)
+
+    @staticmethod
+    def _write(batch):
+        touched = {}
+        for record, handlers in batch:
+            if callable(handlers):
+                handlers = handlers(record)
+            for handler in handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+                    touched[handler] = None
+
+        for handler in touched:
+            try:
+                getattr(handler, "flush_batch", handler.flush)()
+            except Exception:
+                traceback.print_exc()
+
+    def stop(self, timeout=5):
+        with self._state_lock:
+            self._stopped = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+
+    def stats(self):
+        with self._state_lock:
+            return {
+                "queued": len(self._pending),
+                "dropped": self.dropped,
+                "policy": self.policy,
+            }
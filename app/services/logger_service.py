@@ -1,8 +1,48 @@
 import logging
-import inspect
 import os
+import random
+import sys
+from contextvars import ContextVar
 from datetime import datetime
-from flask import request
+from flask import has_request_context, request
+
+from app.services.log_writer_service import (
+    BatchedFileHandler,
+    BatchedStreamHandler,
+    JSONFormatter,
+    LogFormat,
+    LogWriter,
+    QueuedHandler,
+)
+
+# Id of the API request a log line belongs to, copied into crawl threads
+request_id_var = ContextVar("request_id", default=None)
+
+# Record fields written by the JSON format besides time, level and message
+LOG_FIELDS = ("route", "function", "ip", "user_agent", "request_id")
+
+# Functions of the logging call chain skipped when resolving the caller
+LOGGER_FUNCTIONS = frozenset(
+    {
+        "log",
+        "debug",
+        "info",
+        "warning",
+        "error",
+        "critical",
+        "exception",
+        "__init__",
+    }
+)
+
+
+def find_caller_function(depth=1):
+    # Walks frame objects directly, unlike inspect.stack() it does not build
+    # frame info or read source context for the whole stack
+    frame = sys._getframe(depth + 1)
+    while frame is not None and frame.f_code.co_name in LOGGER_FUNCTIONS:
+        frame = frame.f_back
+    return frame.f_code.co_name if frame is not None else "Unknown"
 
 
 class ColoredFormatter(logging.Formatter):
@@ -61,53 +101,80 @@ class LoggerService:
                 log_dir, f"{datetime.now().strftime('%Y-%m-%d')}.log"
             )
 
-            # Log format
-            formatter = ColoredFormatter(
-                "%(asctime)s - %(levelname)s - %(route)s %(function)s - %(log_message)s - %(ip)s - %(user_agent)s"
-            )
-
             # File handler (write to date-based log file)
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setFormatter(
-                logging.Formatter(
-                    "%(asctime)s - %(levelname)s %(route)s %(function)s - %(log_message)s - %(ip)s - %(user_agent)s"
-                )
-            )
+            self.file_handler = BatchedFileHandler(log_file)
 
             # Stream handler (colored for console output)
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
+            self.console_handler = BatchedStreamHandler()
+            self._set_formatters(LogFormat.TEXT.value)
 
-            # Add handlers to logger
-            self.logger.addHandler(file_handler)
-            self.logger.addHandler(console_handler)
+            # Records are written by the shared background writer
+            self.logger.addHandler(
+                QueuedHandler(LogWriter(), [self.file_handler, self.console_handler])
+            )
+
+            # Sample rates by message type or route, see configure
+            self.sample_rates = {}
+
+    def _set_formatters(self, log_format):
+        if log_format == LogFormat.JSON.value:
+            formatter = JSONFormatter(LOG_FIELDS)
+            self.file_handler.setFormatter(formatter)
+            self.console_handler.setFormatter(formatter)
+            return
+
+        self.file_handler.setFormatter(
+            logging.Formatter(
+                "%(asctime)s - %(levelname)s %(route)s %(function)s - %(log_message)s - %(ip)s - %(user_agent)s - %(request_id)s"
+            )
+        )
+        self.console_handler.setFormatter(
+            ColoredFormatter(
+                "%(asctime)s - %(levelname)s - %(route)s %(function)s - %(log_message)s - %(ip)s - %(user_agent)s - %(request_id)s"
+            )
+        )
+
+    def configure(self, level, log_format, sample_rates):
+        # Called by APIConfig once the environment is loaded
+        self.logger.setLevel(level)
+        self._set_formatters(log_format)
+        self.sample_rates = sample_rates
+
+    def _is_sampled(self, *keys):
+        # The first key with a configured rate decides, unlisted lines are kept
+        for key in keys:
+            rate = self.sample_rates.get(key)
+            if rate is not None:
+                return rate >= 1 or random.random() < rate
+        return True
+
+    def log(self, level, message, route=None, func=None, sample_key=None):
+        # Nothing below is worth computing for a record that is filtered out
+        if not self.logger.isEnabledFor(level):
+            return
+
+        # Capture the route, user's IP and user agent straight from the environ
+        if has_request_context():
+            environ = request.environ
+            route = route or request.path
+            rule = request.url_rule.rule if request.url_rule else None
+            ip = environ.get("REMOTE_ADDR")
+            user_agent = environ.get("HTTP_USER_AGENT", "")
+        else:
+            route = route or "Unknown"
+            rule = None
+            ip = "INTERNAL"
+            user_agent = "INTERNAL"
+
+        if self.sample_rates and not self._is_sampled(sample_key, rule, route):
+            return
 
-    def log(self, level, message, route=None, func=None):
         if isinstance(message, list):
             message = " | ".join(map(str, message))  # Format list as a string
 
-        # Get route and function details if not provided
-        if not route:
-            route = request.path if request else "Unknown"
+        # Get function details if not provided
         if not func:
-            func = inspect.stack()[1].function
-            curr_stack_idx = 1
-            while func in [
-                "log",
-                "debug",
-                "info",
-                "warning",
-                "error",
-                "critical",
-                "exception",
-                "__init__",
-            ]:
-                curr_stack_idx += 1
-                func = inspect.stack()[curr_stack_idx].function
-
-        # Capture the user's IP and user agent
-        ip = request.remote_addr if request else "INTERNAL"
-        user_agent = request.user_agent.string if request else "INTERNAL"
+            func = find_caller_function()
 
         # Use 'extra' to pass custom fields to the logger
         extra = {
@@ -116,20 +183,21 @@ class LoggerService:
             "log_message": message,  # Use 'log_message' instead of 'message'
             "ip": ip,
             "user_agent": user_agent,
+            "request_id": request_id_var.get() or "INTERNAL",
         }
         self.logger.log(level, message, extra=extra)
 
-    def debug(self, message, route=None, func=None):
-        self.log(logging.DEBUG, message, route, func)
+    def debug(self, message, route=None, func=None, sample_key=None):
+        self.log(logging.DEBUG, message, route, func, sample_key)
 
-    def info(self, message, route=None, func=None):
-        self.log(logging.INFO, message, route, func)
+    def info(self, message, route=None, func=None, sample_key=None):
+        self.log(logging.INFO, message, route, func, sample_key)
 
-    def warning(self, message, route=None, func=None):
-        self.log(logging.WARNING, message, route, func)
+    def warning(self, message, route=None, func=None, sample_key=None):
+        self.log(logging.WARNING, message, route, func, sample_key)
 
-    def error(self, message, route=None, func=None):
-        self.log(logging.ERROR, message, route, func)
+    def error(self, message, route=None, func=None, sample_key=None):
+        self.log(logging.ERROR, message, route, func, sample_key)
 
-    def critical(self, message, route=None, func=None):
-        self.log(logging.CRITICAL, message, route, func)
+    def critical(self, message, route=None, func=None, sample_key=None):
+        self.log(logging.CRITICAL, message, route, func, sample_key)
@@ -0,0 +1,247 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+from sqlalchemy import event
+
+# Latency buckets in seconds, shared by every histogram
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def add_request_timing(name, seconds):
+    # Accumulates a named phase of the current request, e.g. db or serialize
+    if not has_request_context():
+        return
+    timings = g.setdefault("request_timings", {})
+    timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed_phase(timings, name):
+    # Adds the time spent in the block to timings[name], also when it raises
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started_at
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    add_request_timing("db", time.perf_counter() - context._query_started_at)
+
+
+def _handle_error(exception_context):
+    started_at = getattr(exception_context.execution_context, "_query_started_at", None)
+    if started_at is not None:
+        add_request_timing("db", time.perf_counter() - started_at)
+
+
+def instrument_engine(engine):
+    # Adds the time spent in SQL statements to the request's db phase. The
+    # start time lives on the statement's execution context, a statement
+    # that raises leaves nothing behind on the pooled connection. Engines are
+    # process wide, an engine already instrumented by another app is skipped.
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        # Cumulative bucket counts keyed by their upper bound
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+class MetricsService:
+    """
+    Process-local metrics registry rendered in the Prometheus text format.
+    Histograms and counters are recorded directly, gauges are read from
+    callbacks at scrape time.
+    """
+
+    _instance = None  # Singleton instance
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "_histograms"):  # Avoid reinitializing the registry
+            return
+
+        self._help = {}
+        self._histograms = {}  # name -> {labels: _Histogram}
+        self._counters = {}  # name -> {labels: value}
+        self._callbacks = {}  # name -> (type, callback)
+        self._metrics_lock = threading.Lock()
+
+    def observe(self, name, value, labels=(), help_text=None, buckets=DEFAULT_BUCKETS):
+        with self._metrics_lock:
+            if help_text:
+                self._help.setdefault(name, help_text)
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, labels=(), help_text=None):
+        with self._metrics_lock:
+            if help_text:
+                self._help.setdefault(name, help_text)
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + amount
+
+    def register_callback(self, name, callback, metric_type="gauge", help_text=None):
+        # The callback returns a number, or a {labels: value} dict. Histogram
+        # values are shaped like _Histogram.snapshot().
+        with self._metrics_lock:
+            if help_text:
+                self._help[name] = help_text
+            self._callbacks[name] = (metric_type, callback)
+
+    def _render_header(self, lines, name, metric_type):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    @staticmethod
+    def _render_histogram(lines, name, labels, snapshot):
+        for bound, cumulative in snapshot["buckets"].items():
+            lines.append(
+                f"{name}_bucket{_format_labels((*labels, ('le', bound)))} {cumulative}"
+            )
+        lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+
+    def render(self):
+        lines = []
+        with self._metrics_lock:
+            for name, series in sorted(self._histograms.items()):
+                self._render_header(lines, name, "histogram")
+                for labels, histogram in series.items():
+                    self._render_histogram(lines, name, labels, histogram.snapshot())
+
+            for name, series in sorted(self._counters.items()):
+                self._render_header(lines, name, "counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+            callbacks = sorted(self._callbacks.items())
+
+        # Callbacks may take their own locks, run them outside of ours
+        for name, (metric_type, callback) in callbacks:
+            value = callback()
+            if value is None:
+                continue
+            with self._metrics_lock:
+                self._render_header(lines, name, metric_type)
+            if metric_type == "histogram":
+                for labels, snapshot in value.items():
+                    self._render_histogram(lines, name, labels, snapshot)
+            elif isinstance(value, dict):
+                for labels, series_value in value.items():
+                    lines.append(f"{name}{_format_labels(labels)} {series_value}")
+            else:
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class RequestTimer:
+    """
+    Before/after request hooks recording per-route latency histograms and a
+    Server-Timing header with the db and serialization phases.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    @staticmethod
+    def start():
+        g.request_started_at = time.perf_counter()
+
+    def finish(self, response, route, method):
+        started_at = g.pop("request_started_at", None)
+        if started_at is None:
+            return response
+
+        total = time.perf_counter() - started_at
+        timings = g.pop("request_timings", {})
+        labels = (("route", route), ("method", method))
+
+        self.metrics.observe(
+            "http_request_duration_seconds",
+            total,
+            (*labels, ("status", str(response.status_code))),
+            help_text="Time to produce the response headers and buffered body",
+        )
+        for phase, seconds in timings.items():
+            self.metrics.observe(
+                f"http_request_{phase}_duration_seconds",
+                seconds,
+                labels,
+                help_text=f"Time spent in the {phase} phase of a request",
+            )
+
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                *(
+                    f"{phase};dur={seconds * 1000:.2f}"
+                    for phase, seconds in timings.items()
+                ),
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+        return response
@@ -0,0 +1,94 @@
+import queue
+import threading
+
+from app.services.logger_service import LoggerService
+from app.utils.api_consts import APIConfig
+
+api_config = APIConfig()
+logger = LoggerService()
+
+
+class PriceSubscription:
+    def __init__(self, symbols, buffer_size):
+        # An empty set subscribes to every symbol
+        self.symbols = frozenset(symbols)
+        self.events = queue.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    def offer(self, event):
+        # Never blocks the publisher, a full buffer marks a slow consumer
+        try:
+            self.events.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped = True
+            return False
+
+    def next_event(self, timeout):
+        # Returns None when nothing arrived within the timeout
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class PriceBroker:
+    """
+    Fans out newly crawled prices to live subscribers, each with a bounded
+    buffer. Subscribers that fall a full buffer behind are dropped instead of
+    slowing the crawl down.
+    """
+
+    _instance = None  # Singleton instance
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "_subscriptions"):  # Avoid reinitializing the broker
+            return
+
+        self.buffer_size = api_config.sse_buffer_size
+        self.max_subscribers = api_config.sse_max_subscribers
+        self._subscriptions = set()
+        self._subscriptions_lock = threading.Lock()
+
+    def subscribe(self, symbols=()):
+        # Returns None once the subscriber limit is reached
+        with self._subscriptions_lock:
+            if len(self._subscriptions) >= self.max_subscribers:
+                return None
+            subscription = PriceSubscription(symbols, self.buffer_size)
+            self._subscriptions.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._subscriptions_lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, symbol, event):
+        with self._subscriptions_lock:
+            subscriptions = [
+                subscription
+                for subscription in self._subscriptions
+                if not subscription.symbols or symbol in subscription.symbols
+            ]
+
+        for subscription in subscriptions:
+            if not subscription.offer(event):
+                self.unsubscribe(subscription)
+                logger.warning(
+                    f"Dropped slow price stream subscriber after {self.buffer_size} buffered events",
+                    route="INTERNAL/PriceBroker",
+                    func="publish",
+                )
+
+    def subscriber_count(self):
+        with self._subscriptions_lock:
+            return len(self._subscriptions)
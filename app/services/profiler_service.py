@@ -0,0 +1,243 @@
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from flask import g, request
+from itsdangerous import BadSignature, TimestampSigner
+
+from app.services.logger_service import LoggerService
+from app.utils.api_consts import APIConfig, ProfilingMode
+
+api_config = APIConfig()
+logger = LoggerService()
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_TOKEN_SALT = "profile"
+PROFILE_TOKEN_MAX_AGE_SECONDS = 300
+
+
+class _SamplingProfiler:
+    """
+    Samples the stack of a single thread at a fixed interval from a
+    background thread. Much cheaper than cProfile on deep call paths, at the
+    cost of statistical rather than exact counts.
+    """
+
+    def __init__(self, thread_id, interval_seconds):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        # Collapsed stack format, as consumed by flamegraph tools
+        with open(path, "w", encoding="utf-8") as profile_file:
+            for stack, count in self.stacks.most_common():
+                profile_file.write(f"{stack} {count}\n")
+
+
+class ProfilerService:
+    """
+    Opt-in per-request profiling. A request is profiled when PROFILING_ENABLED
+    is set and it either carries a valid signed X-Profile-Token header or is
+    picked by PROFILING_SAMPLE_RATE. Tokens are generated with the shared
+    secret:
+
+        python -c "from itsdangerous import TimestampSigner; \\
+            print(TimestampSigner('<secret>', salt='profile').sign('profile').decode())"
+    """
+
+    _instance = None  # Singleton instance
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "enabled"):  # Avoid reinitializing the profiler
+            return
+
+        self.enabled = api_config.profiling_enabled
+        self.mode = api_config.profiling_mode
+        self.sample_rate = api_config.profiling_sample_rate
+        self.sample_interval_seconds = api_config.profiling_sample_interval_ms / 1000
+        self.profile_dir = api_config.profiling_dir
+        self.max_files = api_config.profiling_max_files
+        self._signer = (
+            TimestampSigner(api_config.profiling_secret, salt=PROFILE_TOKEN_SALT)
+            if api_config.profiling_secret
+            else None
+        )
+
+    def is_authorized(self):
+        token = request.headers.get(PROFILE_HEADER)
+        if not token or self._signer is None:
+            return False
+        try:
+            self._signer.unsign(token, max_age=PROFILE_TOKEN_MAX_AGE_SECONDS)
+            return True
+        except BadSignature:
+            return False
+
+    def _should_profile(self):
+        if not self.enabled:
+            return False
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        return self.is_authorized()
+
+    def start(self):
+        if not self._should_profile():
+            return
+
+        if self.mode == ProfilingMode.SAMPLING.value:
+            profiler = _SamplingProfiler(
+                threading.get_ident(), self.sample_interval_seconds
+            )
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        g.profiler = profiler
+
+    def stop(self):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return
+
+        if isinstance(profiler, _SamplingProfiler):
+            profiler.stop()
+            extension = "folded"
+        else:
+            profiler.disable()
+            extension = "prof"
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        endpoint = (request.endpoint or "unmatched").replace(".", "_")
+        path = os.path.join(
+            self.profile_dir,
+            f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}_{request.method}_{endpoint}.{extension}",
+        )
+        if isinstance(profiler, _SamplingProfiler):
+            profiler.dump(path)
+        else:
+            profiler.dump_stats(path)
+        logger.info(f"Request profile written to {path}")
+        self._prune_profiles()
+
+    def _profile_names(self):
+        # Newest first, names start with their creation time
+        return sorted(
+            (
+                name
+                for name in os.listdir(self.profile_dir)
+                if name.endswith((".prof", ".folded"))
+            ),
+            reverse=True,
+        )
+
+    def _prune_profiles(self):
+        # Keeps the newest max_files profiles, sampled requests would
+        # otherwise fill the disk of a long running server
+        for name in self._profile_names()[self.max_files :]:
+            try:
+                os.remove(os.path.join(self.profile_dir, name))
+            except FileNotFoundError:
+                # Already pruned by another worker
+                pass
+
+    @staticmethod
+    def _top_functions_prof(path, top):
+        stats = pstats.Stats(path).stats
+        rows = [
+            {
+                "function": f"{func} ({os.path.basename(filename)}:{line})",
+                "calls": calls,
+                "self_seconds": round(self_time, 6),
+                "cumulative_seconds": round(cumulative_time, 6),
+            }
+            for (filename, line, func), (
+                _,
+                calls,
+                self_time,
+                cumulative_time,
+                _,
+            ) in stats.items()
+        ]
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+        return rows[:top]
+
+    @staticmethod
+    def _top_functions_folded(path, top):
+        self_samples = Counter()
+        cumulative_samples = Counter()
+        with open(path, encoding="utf-8") as profile_file:
+            for line in profile_file:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                frames = stack.split(";")
+                self_samples[frames[-1]] += int(count)
+                for frame in set(frames):
+                    cumulative_samples[frame] += int(count)
+        return [
+            {
+                "function": frame,
+                "self_samples": self_samples[frame],
+                "cumulative_samples": samples,
+            }
+            for frame, samples in cumulative_samples.most_common(top)
+        ]
+
+    def list_profiles(self, limit=10, top=15):
+        if not os.path.isdir(self.profile_dir):
+            return []
+
+        names = self._profile_names()[:limit]
+
+        profiles = []
+        for name in names:
+            path = os.path.join(self.profile_dir, name)
+            if name.endswith(".prof"):
+                top_functions = self._top_functions_prof(path, top)
+            else:
+                top_functions = self._top_functions_folded(path, top)
+            profiles.append(
+                {
+                    "name": name,
+                    "created_at": datetime.fromtimestamp(
+                        os.path.getmtime(path), timezone.utc
+                    ),
+                    "top_functions": top_functions,
+                }
+            )
+        return profiles
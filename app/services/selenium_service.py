@@ -1,6 +1,5 @@
 import os
 import threading
-import queue
 import time
 from datetime import datetime, timezone
 
@@ -14,6 +13,7 @@ from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
 from app.services.crawler_logger_service import CrawlerLogger
 from app.services.logger_service import LoggerService
+from app.services.metrics_service import timed_phase
 
 crawler_logger = CrawlerLogger("finance_crawler", identifier="finance")
 logger = LoggerService()
@@ -83,112 +83,52 @@ class SeleniumService:
                 "WebDriver closed successfully", sub_identifier="Default"
             )
 
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
-
-
-class SeleniumRequestProcessor:
-    def __init__(self):
-        self.stock_symbols_queue = queue.Queue()
-        self.stop_event = threading.Event()
-        self.results = []
-        self.results_lock = threading.Lock()
-        self.thread = None  # Thread will be created when starting the process
-
-    def start(self):
-        if self.thread and self.thread.is_alive():
-            logger.warning("Crawler process is already running.")
-            return
-
-        logger.info(
-            f"Starting crawler process with {self.stock_symbols_queue.qsize()} requests.",
-            route="INTERNAL/SeleniumRequestProcessor",
-            func="start",
-        )
-        self.stop_event.clear()
-        self.results.clear()
-        self.thread = threading.Thread(target=self._process_requests, daemon=True)
-        self.thread.start()
-
-    def stop(self):
-        self.stop_event.set()
-        # Wait for the queue to be emptied
-        self.stock_symbols_queue.join()
-
-        if self.thread:
-            self.thread.join(timeout=5)
-            if self.thread.is_alive():
-                logger.warning("Crawler process did not shut down cleanly.")
-            else:
-                logger.info(
-                    "Crawler process stopped.",
-                    route="INTERNAL/SeleniumRequestProcessor",
-                    func="stop",
-                )
-            self.thread = None  # Reset thread after stopping
-
-    def add_request(self, symbol):
-        self.stock_symbols_queue.put(symbol)
-
-    def add_result(self, result):
-        with self.results_lock:
-            self.results.append(result)
-
-    def get_results(self):
-        with self.results_lock:
-            return list(self.results)
-
-    def _process_requests(self):
-        while not self.stop_event.is_set() or not self.stock_symbols_queue.empty():
-            try:
-                symbol = self.stock_symbols_queue.get(timeout=1)
-                result = self._fetch_stock_price(symbol, time.time())
-                if result:
-                    self.add_result(result)
-                self.stock_symbols_queue.task_done()
-            except queue.Empty:
-                time.sleep(0.1)
-
-    def _fetch_stock_price(self, symbol, start_time, retries=3):
+    def fetch_stock_price(self, symbol, retries=3, timings=None):
+        # Returns None when the price did not show up within the retries, any
+        # other error is raised since the driver may be unusable afterwards.
+        # The navigation, element_wait and parse phases of all retries are
+        # added up in timings when given.
+        timings = {} if timings is None else timings
+        start_time = time.perf_counter()
         for attempt in range(retries):
             try:
-                with SeleniumService() as selenium_service:
-                    driver = selenium_service.get_driver()
-                    crawler_logger.info(
-                        f"Fetching URL: https://www.google.com/finance/quote/{symbol}",
-                        sub_identifier="Default",
-                    )
-                    driver.get(f"https://www.google.com/finance/quote/{symbol}")
-                    price_element = WebDriverWait(driver, 5).until(
+                crawler_logger.info(
+                    f"Fetching URL: https://www.google.com/finance/quote/{symbol}",
+                    sub_identifier="Default",
+                )
+                with timed_phase(timings, "navigation"):
+                    self.driver.get(f"https://www.google.com/finance/quote/{symbol}")
+                with timed_phase(timings, "element_wait"):
+                    price_element = WebDriverWait(self.driver, 5).until(
                         EC.presence_of_element_located(
                             (By.XPATH, '//*[@class="YMlKec fxKbKc"]')
                         )
                     )
+                with timed_phase(timings, "parse"):
                     stock_price = price_element.text
-                    diff = round(time.time() - start_time, 2)
-                    crawler_logger.info(
-                        f"Fetched {symbol}: {stock_price} in {diff}s",
-                        sub_identifier=symbol,
-                    )
-                    return {
-                        "symbol": symbol,
-                        "price": stock_price,
-                        "timestamp": datetime.now(timezone.utc),
-                    }
+                diff = round(time.perf_counter() - start_time, 2)
+                crawler_logger.info(
+                    f"Fetched {symbol}: {stock_price} in {diff}s",
+                    sub_identifier=symbol,
+                )
+                return {
+                    "symbol": symbol,
+                    "price": stock_price,
+                    "timestamp": datetime.now(timezone.utc),
+                }
             except (TimeoutException, NoSuchElementException) as e:
                 crawler_logger.warning(
                     f"Retry {attempt + 1} failed for {symbol}: {e}",
                     sub_identifier=symbol,
                 )
-                if attempt == retries - 1:
-                    crawler_logger.error(
-                        f"Failed to fetch {symbol} after {retries} retries.",
-                        sub_identifier=symbol,
-                    )
-                    return None
-            except Exception as e:
-                crawler_logger.error(f"Unexpected error: {e}", sub_identifier=symbol)
-                return None
+        crawler_logger.error(
+            f"Failed to fetch {symbol} after {retries} retries.",
+            sub_identifier=symbol,
+        )
+        return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,122 @@
+"""
+Columnar binary encoding of finance history.
+
+Layout, little-endian:
+
+    offset  size        field
+    0       4           magic b"FHC1"
+    4       1           version (1)
+    5       1           flags, bit 0 set when timestamps are delta encoded
+    6       2           reserved
+    8       8           row count N (uint64)
+    16      8 * N       current_price column, float64
+    16+8N   8 * N       created_at column, int64 epoch milliseconds
+                        or, with the delta flag, a uint64 byte length
+                        followed by zigzag varints: the first timestamp,
+                        then the difference to the previous one
+
+The price column always starts on an 8-byte boundary, so clients can map it
+straight into a typed array.
+"""
+
+import struct
+import sys
+from array import array
+
+COLUMNAR_MIMETYPE = "application/x-finance-history-columnar"
+
+MAGIC = b"FHC1"
+VERSION = 1
+FLAG_DELTA_TIMESTAMPS = 0x01
+
+_HEADER = struct.Struct("<4sBBHQ")
+_LENGTH = struct.Struct("<Q")
+
+
+def build_history_columns(batches):
+    # Batches of (current_price, epoch_ms) rows, appended column-wise
+    prices = array("d")
+    timestamps = array("q")
+    for batch in batches:
+        if not batch:
+            continue
+        batch_prices, batch_timestamps = zip(*batch)
+        prices.extend(batch_prices)
+        timestamps.extend(batch_timestamps)
+    return prices, timestamps
+
+
+def _encode_varint_deltas(values):
+    out = bytearray()
+    previous = 0
+    for value in values:
+        delta = value - previous
+        previous = value
+        zigzag = (delta << 1) ^ (delta >> 63)
+        while zigzag >= 0x80:
+            out.append((zigzag & 0x7F) | 0x80)
+            zigzag >>= 7
+        out.append(zigzag)
+    return out
+
+
+def _decode_varint_deltas(data, count):
+    values = array("q")
+    previous = shift = zigzag = 0
+    for byte in data:
+        zigzag |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += (zigzag >> 1) ^ -(zigzag & 1)
+        values.append(previous)
+        shift = zigzag = 0
+    if len(values) != count:
+        raise ValueError("Truncated timestamp column")
+    return values
+
+
+def encode_history_columns(prices, timestamps, delta=False):
+    # Returns a list of buffers, the arrays are passed through without copying
+    # on little-endian hosts
+    if sys.byteorder != "little":
+        prices, timestamps = array("d", prices), array("q", timestamps)
+        prices.byteswap()
+        timestamps.byteswap()
+
+    flags = FLAG_DELTA_TIMESTAMPS if delta else 0
+    chunks = [
+        _HEADER.pack(MAGIC, VERSION, flags, 0, len(prices)),
+        memoryview(prices).cast("B"),
+    ]
+    if delta:
+        encoded = _encode_varint_deltas(timestamps)
+        chunks.extend([_LENGTH.pack(len(encoded)), bytes(encoded)])
+    else:
+        chunks.append(memoryview(timestamps).cast("B"))
+    return chunks
+
+
+def decode_history_columns(data):
+    magic, version, flags, _, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a finance history columnar payload")
+
+    offset = _HEADER.size
+    prices = array("d")
+    prices.frombytes(data[offset : offset + 8 * count])
+    offset += 8 * count
+
+    if flags & FLAG_DELTA_TIMESTAMPS:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        timestamps = _decode_varint_deltas(data[offset : offset + length], count)
+    else:
+        timestamps = array("q")
+        timestamps.frombytes(data[offset : offset + 8 * count])
+
+    if sys.byteorder != "little":
+        prices.byteswap()
+        if not flags & FLAG_DELTA_TIMESTAMPS:
+            timestamps.byteswap()
+    return prices, timestamps
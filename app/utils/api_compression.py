@@ -0,0 +1,145 @@
+import zlib
+
+from flask import request
+
+from app.utils.api_columnar import COLUMNAR_MIMETYPE
+from app.utils.api_consts import APIConfig
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+api_config = APIConfig()
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/plain",
+    COLUMNAR_MIMETYPE,
+}
+
+# Statuses that carry no body worth compressing
+UNCOMPRESSED_STATUS_CODES = {204, 206, 304}
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits 16 + MAX_WBITS writes the gzip header and trailer
+        self._compressor = zlib.compressobj(
+            min(max(level, 1), 9), zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=min(max(level, 0), 11))
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(
+            level=min(max(level, 1), 22)
+        ).compressobj()
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def _get_encoders():
+    # Server preference order, used to break ties in the client's q-values
+    encoders = {}
+    if brotli is not None:
+        encoders["br"] = _BrotliStream
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdStream
+    encoders["gzip"] = _GzipStream
+    return encoders
+
+
+ENCODERS = _get_encoders()
+
+
+def negotiate_encoding():
+    accept_encodings = request.accept_encodings
+    best_encoding, best_quality = None, 0
+    for encoding in ENCODERS:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def _stream_compressed(encoder, chunks):
+    # Flushes after every chunk so streamed responses stay incremental
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def compress_response(response):
+    level = api_config.compression_level
+    if (
+        level <= 0
+        or response.status_code < 200
+        or response.status_code in UNCOMPRESSED_STATUS_CODES
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    # The representation depends on Accept-Encoding even when left as is
+    response.vary.add("Accept-Encoding")
+
+    if response.direct_passthrough:
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    encoder = ENCODERS[encoding](level)
+    if response.is_streamed:
+        response.response = _stream_compressed(encoder, response.response)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < api_config.compression_min_size:
+            return response
+        response.set_data(encoder.compress(data) + encoder.finish())
+
+    response.headers["Content-Encoding"] = encoding
+    return response
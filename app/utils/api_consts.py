@@ -1,7 +1,10 @@
 import os
 import sys
+from datetime import datetime
 from enum import Enum
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from dotenv import load_dotenv
+from app.services.log_writer_service import LogFormat, LogQueuePolicy, LogWriter
 from app.services.logger_service import LoggerService
 
 logger = LoggerService()
@@ -12,6 +15,30 @@ class Environment(Enum):
     PRODUCTION = "Production"
 
 
+class ProfilingMode(Enum):
+    DETERMINISTIC = "deterministic"
+    SAMPLING = "sampling"
+
+
+class LogLevel(Enum):
+    DEBUG = "DEBUG"
+    INFO = "INFO"
+    WARNING = "WARNING"
+    ERROR = "ERROR"
+    CRITICAL = "CRITICAL"
+
+
+class CacheBackend(Enum):
+    MEMORY = "memory"
+    SQLITE = "sqlite"
+
+
+class DailyChangeMode(Enum):
+    OFF = "off"
+    BATCH = "batch"
+    CLOSE = "close"
+
+
 class APIConfig:
     _instance = None
 
@@ -28,6 +55,127 @@ class APIConfig:
         self._load_env_file()
         self._port = self._get_validated_port()
         self._env = self._get_validated_env()
+        self._api_only = self._get_validated_bool("API_ONLY", False)
+        self._async_db = self._get_validated_bool("ASYNC_DB", False)
+        self._cache_ttl_seconds = self._get_validated_int("CACHE_TTL_SECONDS", 30)
+        self._cache_max_entries = self._get_validated_int("CACHE_MAX_ENTRIES", 1024)
+        self._cache_backend = self._get_validated_choice(
+            "CACHE_BACKEND", CacheBackend, CacheBackend.MEMORY
+        )
+        self._cache_sqlite_path = os.getenv("CACHE_SQLITE_PATH", "db/cache.db")
+        self._compression_min_size = self._get_validated_int(
+            "COMPRESSION_MIN_SIZE", 1024
+        )
+        self._compression_level = self._get_validated_int("COMPRESSION_LEVEL", 6)
+        self._sse_heartbeat_seconds = self._get_validated_int(
+            "SSE_HEARTBEAT_SECONDS", 15, min_value=1
+        )
+        self._sse_buffer_size = self._get_validated_int(
+            "SSE_BUFFER_SIZE", 100, min_value=1
+        )
+        self._sse_max_subscribers = self._get_validated_int("SSE_MAX_SUBSCRIBERS", 100)
+        self._admission_enabled = self._get_validated_bool("ADMISSION_ENABLED", True)
+        self._admission_max_concurrency = self._get_validated_int(
+            "ADMISSION_MAX_CONCURRENCY", 16, min_value=1
+        )
+        self._admission_max_queue = self._get_validated_int("ADMISSION_MAX_QUEUE", 32)
+        self._admission_queue_timeout_ms = self._get_validated_int(
+            "ADMISSION_QUEUE_TIMEOUT_MS", 1000
+        )
+        self._admission_latency_target_ms = self._get_validated_int(
+            "ADMISSION_LATENCY_TARGET_MS", 2000, min_value=1
+        )
+        self._admission_rate_per_second = self._get_validated_float(
+            "ADMISSION_RATE_PER_SECOND", 20.0
+        )
+        self._admission_burst = self._get_validated_int(
+            "ADMISSION_BURST", 40, min_value=1
+        )
+        self._profiling_enabled = self._get_validated_bool("PROFILING_ENABLED", False)
+        self._profiling_mode = self._get_validated_choice(
+            "PROFILING_MODE", ProfilingMode, ProfilingMode.DETERMINISTIC
+        )
+        self._profiling_secret = os.getenv("PROFILING_SECRET")
+        self._profiling_sample_rate = self._get_validated_float(
+            "PROFILING_SAMPLE_RATE", 0.0
+        )
+        self._profiling_sample_interval_ms = self._get_validated_int(
+            "PROFILING_SAMPLE_INTERVAL_MS", 5, min_value=1
+        )
+        self._profiling_dir = os.getenv("PROFILING_DIR", "profiles")
+        self._profiling_max_files = self._get_validated_int(
+            "PROFILING_MAX_FILES", 200, min_value=1
+        )
+        self._crawl_batch_size = self._get_validated_int(
+            "CRAWL_BATCH_SIZE", 5, min_value=1
+        )
+        self._crawl_lease_seconds = self._get_validated_int(
+            "CRAWL_LEASE_SECONDS", 60, min_value=3
+        )
+        self._crawl_max_attempts = self._get_validated_int(
+            "CRAWL_MAX_ATTEMPTS", 5, min_value=1
+        )
+        self._crawl_retry_backoff_seconds = self._get_validated_int(
+            "CRAWL_RETRY_BACKOFF_SECONDS", 30, min_value=1
+        )
+        self._crawler_concurrency = self._get_validated_int(
+            "CRAWLER_CONCURRENCY", 1, min_value=1
+        )
+        self._crawler_poll_seconds = self._get_validated_float(
+            "CRAWLER_POLL_SECONDS", 5, min_value=0.1
+        )
+        self._history_poll_seconds = self._get_validated_float(
+            "HISTORY_POLL_SECONDS", 1, min_value=0.1
+        )
+        self._crawl_scheduler_enabled = self._get_validated_bool(
+            "CRAWL_SCHEDULER_ENABLED", True
+        )
+        self._crawl_interval_seconds = self._get_validated_int(
+            "CRAWL_INTERVAL_SECONDS", 300, min_value=1
+        )
+        self._crawl_interval_jitter = self._get_validated_float(
+            "CRAWL_INTERVAL_JITTER", 0.1
+        )
+        self._crawl_off_hours_multiplier = self._get_validated_float(
+            "CRAWL_OFF_HOURS_MULTIPLIER", 6, min_value=1
+        )
+        self._market_tz = self._get_validated_timezone("MARKET_TZ", "America/New_York")
+        self._market_open = self._get_validated_time("MARKET_OPEN", "09:30")
+        self._market_close = self._get_validated_time("MARKET_CLOSE", "16:00")
+        self._daily_change_mode = self._get_validated_choice(
+            "DAILY_CHANGE_MODE", DailyChangeMode, DailyChangeMode.BATCH
+        )
+        self._crawl_dedup = self._get_validated_bool("CRAWL_DEDUP", False)
+        self._crawl_dedup_tolerance = self._get_validated_float(
+            "CRAWL_DEDUP_TOLERANCE", 0.0
+        )
+        self._log_queue_size = self._get_validated_int(
+            "LOG_QUEUE_SIZE", 10000, min_value=1
+        )
+        self._log_queue_policy = self._get_validated_choice(
+            "LOG_QUEUE_POLICY", LogQueuePolicy, LogQueuePolicy.DROP
+        )
+        self._log_max_open_files = self._get_validated_int(
+            "LOG_MAX_OPEN_FILES", 32, min_value=1
+        )
+
+        self._log_level = self._get_validated_choice(
+            "LOG_LEVEL",
+            LogLevel,
+            (
+                LogLevel.DEBUG
+                if self._env == Environment.DEVELOPMENT.value
+                else LogLevel.INFO
+            ),
+        )
+        self._log_format = self._get_validated_choice(
+            "LOG_FORMAT", LogFormat, LogFormat.TEXT
+        )
+        self._log_sample_rates = self._get_validated_sample_rates("LOG_SAMPLE_RATES")
+
+        # The loggers are created before the config, push the settings to them
+        LogWriter().configure(self._log_queue_size, self._log_queue_policy)
+        logger.configure(self._log_level, self._log_format, self._log_sample_rates)
 
     def _load_env_file(self):
         env = os.getenv("ENV")
@@ -59,6 +207,96 @@ class APIConfig:
             "_get_validated_env",
         )
 
+    def _get_validated_int(self, name, default, min_value=0):
+        value_str = os.getenv(name)
+        if not value_str:
+            return default
+        try:
+            value = int(value_str)
+            if value >= min_value:
+                return value
+        except ValueError:
+            pass
+        self._exit_with_error(
+            f"{name} must be an integer greater than or equal to {min_value}",
+            "_get_validated_int",
+        )
+
+    def _get_validated_float(self, name, default, min_value=0.0):
+        value_str = os.getenv(name)
+        if not value_str:
+            return default
+        try:
+            value = float(value_str)
+            if value >= min_value:
+                return value
+        except ValueError:
+            pass
+        self._exit_with_error(
+            f"{name} must be a number greater than or equal to {min_value}",
+            "_get_validated_float",
+        )
+
+    def _get_validated_bool(self, name, default):
+        value_str = os.getenv(name)
+        if not value_str:
+            return default
+        if value_str.lower() in {"true", "1", "yes"}:
+            return True
+        if value_str.lower() in {"false", "0", "no"}:
+            return False
+        self._exit_with_error(f"{name} must be true or false", "_get_validated_bool")
+
+    def _get_validated_choice(self, name, choices, default):
+        value_str = os.getenv(name)
+        if not value_str:
+            return default.value
+        if value_str in {e.value for e in choices}:
+            return value_str
+        self._exit_with_error(
+            f"{name} must be one of {', '.join(e.value for e in choices)}",
+            "_get_validated_choice",
+        )
+
+    def _get_validated_timezone(self, name, default):
+        value_str = os.getenv(name) or default
+        try:
+            return ZoneInfo(value_str)
+        except (ValueError, ZoneInfoNotFoundError):
+            self._exit_with_error(
+                f"{name} must be an IANA time zone, e.g. America/New_York",
+                "_get_validated_timezone",
+            )
+
+    def _get_validated_time(self, name, default):
+        value_str = os.getenv(name) or default
+        try:
+            return datetime.strptime(value_str, "%H:%M").time()
+        except ValueError:
+            self._exit_with_error(
+                f"{name} must be a time of day as HH:MM", "_get_validated_time"
+            )
+
+    def _get_validated_sample_rates(self, name):
+        # Parses "APIWarn:404=0.01,/api/healthz=0" into {key: rate}
+        value_str = os.getenv(name)
+        if not value_str:
+            return {}
+        sample_rates = {}
+        for entry in value_str.split(","):
+            key, _, rate_str = entry.strip().rpartition("=")
+            try:
+                rate = float(rate_str)
+            except ValueError:
+                rate = -1
+            if not key or not 0 <= rate <= 1:
+                self._exit_with_error(
+                    f"{name} entries must look like <key>=<rate between 0 and 1>",
+                    "_get_validated_sample_rates",
+                )
+            sample_rates[key] = rate
+        return sample_rates
+
     def _exit_with_error(self, message, validator):
         logger.error(message, route="INTERNAL/APIConfig", func=validator)
         sys.exit(1)
@@ -70,3 +308,195 @@ class APIConfig:
     @property
     def env(self):
         return self._env
+
+    @property
+    def api_only(self):
+        return self._api_only
+
+    @property
+    def async_db(self):
+        return self._async_db
+
+    @property
+    def cache_ttl_seconds(self):
+        return self._cache_ttl_seconds
+
+    @property
+    def cache_max_entries(self):
+        return self._cache_max_entries
+
+    @property
+    def cache_backend(self):
+        return self._cache_backend
+
+    @property
+    def cache_sqlite_path(self):
+        return self._cache_sqlite_path
+
+    @property
+    def compression_min_size(self):
+        return self._compression_min_size
+
+    @property
+    def compression_level(self):
+        return self._compression_level
+
+    @property
+    def sse_heartbeat_seconds(self):
+        return self._sse_heartbeat_seconds
+
+    @property
+    def sse_buffer_size(self):
+        return self._sse_buffer_size
+
+    @property
+    def sse_max_subscribers(self):
+        return self._sse_max_subscribers
+
+    @property
+    def admission_enabled(self):
+        return self._admission_enabled
+
+    @property
+    def admission_max_concurrency(self):
+        return self._admission_max_concurrency
+
+    @property
+    def admission_max_queue(self):
+        return self._admission_max_queue
+
+    @property
+    def admission_queue_timeout_ms(self):
+        return self._admission_queue_timeout_ms
+
+    @property
+    def admission_latency_target_ms(self):
+        return self._admission_latency_target_ms
+
+    @property
+    def admission_rate_per_second(self):
+        return self._admission_rate_per_second
+
+    @property
+    def admission_burst(self):
+        return self._admission_burst
+
+    @property
+    def profiling_enabled(self):
+        return self._profiling_enabled
+
+    @property
+    def profiling_mode(self):
+        return self._profiling_mode
+
+    @property
+    def profiling_secret(self):
+        return self._profiling_secret
+
+    @property
+    def profiling_sample_rate(self):
+        return self._profiling_sample_rate
+
+    @property
+    def profiling_sample_interval_ms(self):
+        return self._profiling_sample_interval_ms
+
+    @property
+    def profiling_dir(self):
+        return self._profiling_dir
+
+    @property
+    def profiling_max_files(self):
+        return self._profiling_max_files
+
+    @property
+    def crawl_batch_size(self):
+        return self._crawl_batch_size
+
+    @property
+    def crawl_lease_seconds(self):
+        return self._crawl_lease_seconds
+
+    @property
+    def crawl_max_attempts(self):
+        return self._crawl_max_attempts
+
+    @property
+    def crawl_retry_backoff_seconds(self):
+        return self._crawl_retry_backoff_seconds
+
+    @property
+    def crawler_concurrency(self):
+        return self._crawler_concurrency
+
+    @property
+    def crawler_poll_seconds(self):
+        return self._crawler_poll_seconds
+
+    @property
+    def history_poll_seconds(self):
+        return self._history_poll_seconds
+
+    @property
+    def crawl_scheduler_enabled(self):
+        return self._crawl_scheduler_enabled
+
+    @property
+    def crawl_interval_seconds(self):
+        return self._crawl_interval_seconds
+
+    @property
+    def crawl_interval_jitter(self):
+        return self._crawl_interval_jitter
+
+    @property
+    def crawl_off_hours_multiplier(self):
+        return self._crawl_off_hours_multiplier
+
+    @property
+    def market_tz(self):
+        return self._market_tz
+
+    @property
+    def market_open(self):
+        return self._market_open
+
+    @property
+    def market_close(self):
+        return self._market_close
+
+    @property
+    def daily_change_mode(self):
+        return self._daily_change_mode
+
+    @property
+    def crawl_dedup(self):
+        return self._crawl_dedup
+
+    @property
+    def crawl_dedup_tolerance(self):
+        return self._crawl_dedup_tolerance
+
+    @property
+    def log_queue_size(self):
+        return self._log_queue_size
+
+    @property
+    def log_queue_policy(self):
+        return self._log_queue_policy
+
+    @property
+    def log_max_open_files(self):
+        return self._log_max_open_files
+
+    @property
+    def log_level(self):
+        return self._log_level
+
+    @property
+    def log_format(self):
+        return self._log_format
+
+    @property
+    def log_sample_rates(self):
+        return self._log_sample_rates
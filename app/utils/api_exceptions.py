@@ -11,13 +11,16 @@ class APIException(Exception):
         logger_message: str,
         status_code: int = 400,
         log_level: str = "error",
+        headers: dict = None,
     ):
         self.response_message = response_message
         self.status_code = status_code
         self.log_level = log_level
+        self.headers = headers
 
+        # e.g. "APIWarn:404", lets LOG_SAMPLE_RATES thin out routine errors
         log_method = getattr(logger, log_level, logger.error)
-        log_method(logger_message)
+        log_method(logger_message, sample_key=f"{type(self).__name__}:{status_code}")
 
     def __str__(self):
         return f"{self.status_code} - {self.response_message}"
@@ -27,22 +30,40 @@ class APIException(Exception):
             "message": self.response_message,
             "status": self.status_code,
         }
+        if self.headers:
+            return jsonify(response_body), self.status_code, self.headers
         return jsonify(response_body), self.status_code
 
 
 class APIError(APIException):
     def __init__(
-        self, response_message: str, logger_message: str, status_code: int = 400
+        self,
+        response_message: str,
+        logger_message: str,
+        status_code: int = 400,
+        headers: dict = None,
     ):
         super().__init__(
-            response_message, logger_message, status_code, log_level="error"
+            response_message,
+            logger_message,
+            status_code,
+            log_level="error",
+            headers=headers,
         )
 
 
 class APIWarn(APIException):
     def __init__(
-        self, response_message: str, logger_message: str, status_code: int = 400
+        self,
+        response_message: str,
+        logger_message: str,
+        status_code: int = 400,
+        headers: dict = None,
     ):
         super().__init__(
-            response_message, logger_message, status_code, log_level="warning"
+            response_message,
+            logger_message,
+            status_code,
+            log_level="warning",
+            headers=headers,
         )
@@ -0,0 +1,93 @@
+import json
+import time
+from datetime import date, datetime, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.services.metrics_service import add_request_timing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    # Datetimes are emitted as ISO 8601, naive values are stored as UTC
+    if isinstance(o, datetime):
+        if o.tzinfo is None:
+            o = o.replace(tzinfo=timezone.utc)
+        return o.isoformat()
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+def _orjson_default(o):
+    # orjson handles datetimes natively, this only sees the remaining types
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider serializing with orjson when it is installed, falling back to
+    the stdlib json module with the same output format otherwise.
+    """
+
+    # Keep the insertion order the services build the payloads in
+    sort_keys = False
+
+    def _dumps_orjson(self, obj, indent=None):
+        # Returns None when the stdlib path has to take over
+        if orjson is None:
+            return None
+
+        option = orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_orjson_default, option=option)
+        except TypeError:
+            # Types orjson refuses (e.g. ints over 64 bits) go through json
+            return None
+
+    def dumps_bytes(self, obj, indent=None):
+        data = self._dumps_orjson(obj, indent)
+        if data is None:
+            data = self._dumps_stdlib(obj, indent=indent).encode()
+        return data
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs.keys() - {"indent"}:
+            data = self._dumps_orjson(obj, kwargs.get("indent"))
+            if data is not None:
+                return data.decode()
+        return self._dumps_stdlib(obj, **kwargs)
+
+    def _dumps_stdlib(self, obj, **kwargs):
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                # Let json raise its own error type for callers that expect it
+                pass
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = None
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            indent = 2
+
+        started_at = time.perf_counter()
+        data = self.dumps_bytes(obj, indent=indent) + b"\n"
+        add_request_timing("serialize", time.perf_counter() - started_at)
+        return self._app.response_class(data, mimetype=self.mimetype)
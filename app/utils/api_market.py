@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+from app.utils.api_consts import APIConfig
+
+api_config = APIConfig()
+
+
+def _trading_days(now, step):
+    # Weekdays in the market timezone from the day of now on, step is 1 to
+    # go forward and -1 to go back
+    day = now.astimezone(api_config.market_tz).date()
+    while True:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=step)
+
+
+def _market_time(day, clock):
+    return datetime.combine(day, clock, api_config.market_tz).astimezone(
+        timezone.utc
+    )
+
+
+def is_market_open(now):
+    local = now.astimezone(api_config.market_tz)
+    return (
+        local.weekday() < 5
+        and api_config.market_open <= local.time() < api_config.market_close
+    )
+
+
+def next_market_open(now):
+    return next(
+        opens_at
+        for day in _trading_days(now, 1)
+        if (opens_at := _market_time(day, api_config.market_open)) > now
+    )
+
+
+def next_market_close(now):
+    return next(
+        closes_at
+        for day in _trading_days(now, 1)
+        if (closes_at := _market_time(day, api_config.market_close)) > now
+    )
+
+
+def last_market_open(now):
+    return next(
+        opens_at
+        for day in _trading_days(now, -1)
+        if (opens_at := _market_time(day, api_config.market_open)) <= now
+    )
+
+
+def last_market_close(now):
+    return next(
+        closes_at
+        for day in _trading_days(now, -1)
+        if (closes_at := _market_time(day, api_config.market_close)) <= now
+    )
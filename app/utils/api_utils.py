@@ -0,0 +1,60 @@
+import functools
+from datetime import datetime
+
+from flask import jsonify, request
+
+from app.utils.api_consts import APIConfig
+from app.utils.api_exceptions import APIError
+
+api_config = APIConfig()
+
+
+def get_timestamp_arg(name):
+    # Parses an optional ISO 8601 query parameter
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise APIError(
+            f"Invalid {name}", f"Invalid '{name}' timestamp format", 400
+        ) from e
+
+
+def get_fields_arg(allowed_fields):
+    # Parses a sparse fieldset like ?fields=a,b,nested.c, None when absent
+    value = request.args.get("fields")
+    if value is None:
+        return None
+
+    fields = tuple(
+        dict.fromkeys(field.strip() for field in value.split(",") if field.strip())
+    )
+    unknown_fields = [field for field in fields if field not in allowed_fields]
+    if not fields or unknown_fields:
+        raise APIError(
+            "Invalid fields",
+            f"Invalid 'fields' parameter: {', '.join(unknown_fields) or value}",
+            400,
+        )
+    return fields
+
+
+def service_response(view):
+    # Turns a view returning a read service call into a JSON response view.
+    # With ASYNC_DB the call is a coroutine of the async service and the view
+    # is registered as async, otherwise it stays a plain sync view.
+    if api_config.async_db:
+
+        @functools.wraps(view)
+        async def async_view(*args, **kwargs):
+            return jsonify(await view(*args, **kwargs))
+
+        return async_view
+
+    @functools.wraps(view)
+    def sync_view(*args, **kwargs):
+        return jsonify(view(*args, **kwargs))
+
+    return sync_view
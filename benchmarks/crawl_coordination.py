@@ -0,0 +1,217 @@
+"""
+Crawl coordination between several nodes sharing one SQLite file.
+
+Each node is a separate process running the CrawlCoordinator loop: plan the
+crawl (only the first node actually plans it), then lease tasks, heartbeat and
+complete them one symbol at a time until none are left. Fetching a symbol is
+simulated with a sleep, a result is written in the transaction that
+completes its task.
+
+Four runs are reported:
+    - a single node, the baseline
+    - --nodes nodes splitting the same crawl
+    - the same nodes with one of them killed half way through its first
+      lease, its remaining tasks must be taken over once the lease expires
+    - a single node killed half way through the crawl and restarted, it must
+      resume without fetching a stored symbol again
+
+With --fail-rate fetches fail at random and are retried after a backoff,
+symbols still failing after --max-attempts are counted as dead. Every run
+checks that each symbol was stored at most once and that every symbol ended
+stored or dead. Wall times include starting the node processes.
+
+Run from the project root with the server environment (.env) in place:
+
+    python -m benchmarks.crawl_coordination --nodes 4 --symbols 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import timezone
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import sessionmaker
+
+
+def create_database(path):
+    from app.api.finances.crawl_model import Crawl, CrawlTask
+
+    engine = create_engine(f"sqlite:///{path}")
+    Crawl.metadata.create_all(engine, tables=[Crawl.__table__, CrawlTask.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE crawl_results (symbol TEXT NOT NULL, node TEXT)")
+        )
+    engine.dispose()
+
+
+def wait_for_tasks(coordinator):
+    # Claims the next tasks, waiting for retries that are not due yet and
+    # for leases held by other nodes, a node that died keeps its tasks
+    # until the leases expire. Returns an empty list once no task is left.
+    from app.api.finances.crawl_model import CrawlTask
+    from app.services.crawl_coordinator_service import OPEN_TASK_STATUSES, utcnow
+
+    while not (tasks := coordinator.claim_tasks()):
+        with coordinator.session_factory() as session:
+            visible_at = session.execute(
+                select(func.min(CrawlTask.visible_at)).where(
+                    CrawlTask.status.in_(OPEN_TASK_STATUSES)
+                )
+            ).scalar()
+        if visible_at is None:
+            return []
+
+        # SQLite hands the timestamp back without its timezone
+        remaining = visible_at.replace(tzinfo=timezone.utc) - utcnow()
+        time.sleep(
+            min(
+                max(remaining.total_seconds(), 0.1),
+                coordinator.lease.total_seconds() / 3,
+            )
+        )
+    return tasks
+
+
+def run_node(path, symbols, args, crash_after):
+    # crash_after is the number of symbols fetched before the process dies
+    from app.services.crawl_coordinator_service import (
+        CrawlCoordinator,
+        LeaseHeartbeat,
+    )
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 60})
+    coordinator = CrawlCoordinator(
+        sessionmaker(bind=engine),
+        batch_size=args.batch_size,
+        lease_seconds=args.lease_seconds,
+        max_attempts=args.max_attempts,
+        retry_backoff_seconds=1,
+    )
+    coordinator.plan_crawl(symbols)
+
+    fetched = 0
+    with LeaseHeartbeat(coordinator):
+        while tasks := wait_for_tasks(coordinator):
+            for task in tasks:
+                if crash_after is not None and fetched >= crash_after:
+                    # Dies holding its leases, like a node losing power
+                    os._exit(1)
+
+                time.sleep(args.fetch_ms / 1000)
+                fetched += 1
+                if random.random() < args.fail_rate:
+                    coordinator.fail_task(task["id"], "Simulated fetch failure")
+                    continue
+
+                def persist(session, symbol=task["symbol"]):
+                    session.execute(
+                        text(
+                            "INSERT INTO crawl_results (symbol, node) "
+                            "VALUES (:symbol, :node)"
+                        ),
+                        {"symbol": symbol, "node": coordinator.node_id},
+                    )
+
+                coordinator.complete_task(task["id"], persist)
+
+
+def start_nodes(context, path, symbols, args, crash_after):
+    processes = [
+        context.Process(target=run_node, args=(path, symbols, args, crash))
+        for crash in crash_after
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def run_crawl(args, rounds):
+    # rounds is a list of node groups started one after the other, each one
+    # a list with the crash point of every node in it
+    symbols = [f"SYM{index:05d}" for index in range(args.symbols)]
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "crawl.db")
+        create_database(path)
+
+        started_at = time.perf_counter()
+        for crash_after in rounds:
+            start_nodes(context, path, symbols, args, crash_after)
+        elapsed = time.perf_counter() - started_at
+
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.connect() as connection:
+            stored = Counter(
+                symbol
+                for (symbol,) in connection.execute(
+                    text("SELECT symbol FROM crawl_results")
+                )
+            )
+            nodes_used = connection.execute(
+                text("SELECT COUNT(DISTINCT node) FROM crawl_results")
+            ).scalar()
+            statuses = dict(
+                connection.execute(
+                    text("SELECT status, COUNT(*) FROM crawl_tasks GROUP BY status")
+                ).all()
+            )
+            retried = connection.execute(
+                text("SELECT COUNT(*) FROM crawl_tasks WHERE attempts > 1")
+            ).scalar()
+            crawl_status = connection.execute(text("SELECT status FROM crawls")).all()
+        engine.dispose()
+
+    dead = statuses.get("dead", 0)
+    return {
+        "elapsed": elapsed,
+        "nodes_used": nodes_used,
+        "retried": retried,
+        "dead": dead,
+        "missing": len(symbols) - len(stored) - dead,
+        "duplicated": sum(1 for count in stored.values() if count > 1),
+        "crawls": [status for (status,) in crawl_status],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--lease-seconds", type=int, default=3)
+    parser.add_argument("--fetch-ms", type=float, default=20)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'run':>16} {'seconds':>8} {'nodes used':>11} {'retried':>8} "
+        f"{'dead':>5} {'missing':>8} {'duplicated':>11} crawls"
+    )
+    runs = (
+        ("1 node", [[None]]),
+        (f"{args.nodes} nodes", [[None] * args.nodes]),
+        (
+            f"{args.nodes} nodes, kill",
+            [[args.batch_size // 2] + [None] * (args.nodes - 1)],
+        ),
+        ("1 node, restart", [[args.symbols // 2], [None]]),
+    )
+    for label, rounds in runs:
+        result = run_crawl(args, rounds)
+        print(
+            f"{label:>16} {result['elapsed']:>8.2f} {result['nodes_used']:>11} "
+            f"{result['retried']:>8} {result['dead']:>5} {result['missing']:>8} "
+            f"{result['duplicated']:>11} {','.join(result['crawls'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Disk size, insert rate and range-scan speed of the finance_history layouts.
+
+Compares the previous layout (rowid table, autoincrement id, TIMESTAMP text),
+the same with an index on (finance_id, created_at), and the current one, a
+WITHOUT ROWID table clustered by (finance_id, ts_epoch_ms). Rows are inserted
+in time order across symbols, the way the crawler workers write them.
+
+Run from the project root:
+
+    python -m benchmarks.history_storage --rows 1000000 --symbols 50
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+ROWID_TABLE = """
+CREATE TABLE finance_history (
+    id INTEGER NOT NULL PRIMARY KEY,
+    finance_id INTEGER NOT NULL,
+    current_price FLOAT NOT NULL,
+    created_at TIMESTAMP NOT NULL
+)
+"""
+CLUSTERED_TABLE = """
+CREATE TABLE finance_history (
+    finance_id INTEGER NOT NULL,
+    ts_epoch_ms INTEGER NOT NULL,
+    current_price FLOAT NOT NULL,
+    last_seen_epoch_ms INTEGER,
+    PRIMARY KEY (finance_id, ts_epoch_ms)
+) WITHOUT ROWID
+"""
+
+
+def as_text(moment):
+    # The format SQLAlchemy stores TIMESTAMP columns in on SQLite
+    return moment.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def as_epoch_ms(moment):
+    return (moment - EPOCH) // timedelta(milliseconds=1)
+
+
+LAYOUTS = {
+    "rowid": {
+        "ddl": [ROWID_TABLE],
+        "insert": "INSERT INTO finance_history (finance_id, current_price, "
+        "created_at) VALUES (?, ?, ?)",
+        "row": lambda finance_id, price, moment: (finance_id, price, as_text(moment)),
+        "scan": "SELECT current_price, created_at FROM finance_history "
+        "WHERE finance_id = ? AND created_at > ? AND created_at < ? "
+        "ORDER BY created_at",
+        "bound": as_text,
+    },
+    "rowid + index": {
+        "ddl": [
+            ROWID_TABLE,
+            "CREATE INDEX ix_finance_history_finance_id_created_at "
+            "ON finance_history (finance_id, created_at)",
+        ],
+        "insert": "INSERT INTO finance_history (finance_id, current_price, "
+        "created_at) VALUES (?, ?, ?)",
+        "row": lambda finance_id, price, moment: (finance_id, price, as_text(moment)),
+        "scan": "SELECT current_price, created_at FROM finance_history "
+        "WHERE finance_id = ? AND created_at > ? AND created_at < ? "
+        "ORDER BY created_at",
+        "bound": as_text,
+    },
+    "without rowid": {
+        "ddl": [CLUSTERED_TABLE],
+        "insert": "INSERT INTO finance_history (finance_id, ts_epoch_ms, "
+        "current_price) VALUES (?, ?, ?)",
+        "row": lambda finance_id, price, moment: (
+            finance_id,
+            as_epoch_ms(moment),
+            price,
+        ),
+        "scan": "SELECT current_price, ts_epoch_ms FROM finance_history "
+        "WHERE finance_id = ? AND ts_epoch_ms > ? AND ts_epoch_ms < ? "
+        "ORDER BY ts_epoch_ms",
+        "bound": as_epoch_ms,
+    },
+}
+
+
+def generate_rows(rows, symbols, interval):
+    # Every crawl stores one price per symbol, a few milliseconds apart
+    random.seed(0)
+    prices = [random.uniform(10, 500) for _ in range(symbols)]
+    for index in range(rows):
+        crawl, finance_index = divmod(index, symbols)
+        moment = START + timedelta(
+            seconds=crawl * interval, milliseconds=finance_index * 7
+        )
+        prices[finance_index] += random.uniform(-0.5, 0.5)
+        yield finance_index + 1, round(prices[finance_index], 2), moment
+
+
+def run_layout(path, layout, args):
+    connection = sqlite3.connect(path)
+    for statement in layout["ddl"]:
+        connection.execute(statement)
+    connection.commit()
+
+    # Insert rate, one transaction per batch
+    batch = []
+    started_at = time.perf_counter()
+    for finance_id, price, moment in generate_rows(
+        args.rows, args.symbols, args.interval
+    ):
+        batch.append(layout["row"](finance_id, price, moment))
+        if len(batch) == args.batch:
+            connection.executemany(layout["insert"], batch)
+            connection.commit()
+            batch = []
+    if batch:
+        connection.executemany(layout["insert"], batch)
+        connection.commit()
+    insert_seconds = time.perf_counter() - started_at
+
+    connection.execute("VACUUM")
+    page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+    page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+
+    # Range scans of one symbol over a random window
+    crawls = args.rows // args.symbols
+    span = timedelta(seconds=crawls * args.interval)
+    window = timedelta(hours=args.window_hours)
+    random.seed(1)
+    scanned = 0
+    started_at = time.perf_counter()
+    for _ in range(args.queries):
+        finance_id = random.randint(1, args.symbols)
+        window_start = START + random.uniform(0, 1) * max(span - window, timedelta())
+        scanned += len(
+            connection.execute(
+                layout["scan"],
+                (
+                    finance_id,
+                    layout["bound"](window_start),
+                    layout["bound"](window_start + window),
+                ),
+            ).fetchall()
+        )
+    scan_seconds = time.perf_counter() - started_at
+    connection.close()
+
+    return {
+        "size_mb": page_size * page_count / 1_000_000,
+        "rows_per_second": args.rows / insert_seconds,
+        "scan_ms": scan_seconds / args.queries * 1000,
+        "rows_per_scan": scanned / args.queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument(
+        "--interval", type=int, default=60, help="seconds between two crawls"
+    )
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--window-hours", type=float, default=24)
+    args = parser.parse_args()
+
+    print(
+        f"{args.rows} rows, {args.symbols} symbols, "
+        f"{args.window_hours:g}h windows over {args.queries} queries"
+    )
+    print(
+        f"{'layout':<15} {'MB':>8} {'bytes/row':>10} {'inserts/s':>11} "
+        f"{'ms/scan':>9} {'rows/scan':>10}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, layout in LAYOUTS.items():
+            path = os.path.join(directory, f"{name.replace(' ', '_')}.db")
+            result = run_layout(path, layout, args)
+            print(
+                f"{name:<15} {result['size_mb']:>8.1f} "
+                f"{result['size_mb'] * 1_000_000 / args.rows:>10.1f} "
+                f"{result['rows_per_second']:>11.0f} "
+                f"{result['scan_ms']:>9.3f} {result['rows_per_scan']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
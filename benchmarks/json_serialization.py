@@ -0,0 +1,89 @@
+"""
+Serialization throughput of a finance details payload with N history rows.
+
+Compares Flask's default provider (stdlib json, RFC 822 dates) with
+FastJSONProvider on orjson and on its stdlib fallback.
+
+Run from the project root with the server environment (.env) in place:
+
+    python -m benchmarks.json_serialization --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils import api_json
+from app.utils.api_json import FastJSONProvider
+
+
+def build_payload(rows):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return {
+        "id": 1,
+        "symbol": "AAPL:NASDAQ",
+        "is_tracking": True,
+        "last_closing_price": 254,
+        "daily_change_value": 1.25,
+        "daily_change_percentage": 0.49,
+        "created_at": start,
+        "updated_at": start,
+        "finance_history": [
+            {
+                "current_price": 250 + (i % 1000) / 100,
+                # SQLite hands back naive datetimes
+                "created_at": (start + timedelta(seconds=30 * i)).replace(tzinfo=None),
+            }
+            for i in range(rows)
+        ],
+    }
+
+
+def measure(provider, payload, repeat):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = provider.response(payload).get_data()
+        best = min(best, time.perf_counter() - start)
+        size = len(data)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = [
+        ("flask default", DefaultJSONProvider(app)),
+        ("fast (stdlib)", FastJSONProvider(app)),
+    ]
+    if api_json.orjson is not None:
+        providers.append(("fast (orjson)", FastJSONProvider(app)))
+
+    print(f"{'rows':>10} {'provider':<15} {'seconds':>9} {'rows/s':>12} {'MB/s':>8}")
+    for rows in args.sizes:
+        payload = build_payload(rows)
+        for name, provider in providers:
+            if name == "fast (stdlib)":
+                with mock.patch.object(api_json, "orjson", None):
+                    seconds, size = measure(provider, payload, args.repeat)
+            else:
+                seconds, size = measure(provider, payload, args.repeat)
+            print(
+                f"{rows:>10} {name:<15} {seconds:>9.3f} {rows / seconds:>12,.0f} "
+                f"{size / seconds / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
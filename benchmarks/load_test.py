@@ -0,0 +1,135 @@
+"""
+Throughput and latency of the read endpoints with the sync views against the
+async views (ASYNC_DB), at high concurrency.
+
+Each stack is started as a threaded Werkzeug server in a subprocess, with
+admission control and the response cache disabled so every request reaches
+the database. The client keeps --concurrency requests in flight for
+--duration seconds and reports requests per second and latency percentiles.
+
+Run from the project root with the server environment (.env) in place:
+
+    python -m benchmarks.load_test --concurrency 50 200 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_SCRIPT = """
+import sys
+from werkzeug.serving import run_simple
+from app import create_app
+run_simple("127.0.0.1", int(sys.argv[1]), create_app(), threaded=True)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n".encode()
+        )
+        await writer.drain()
+        response = await reader.read()
+        return int(response.split(b" ", 2)[1])
+    finally:
+        writer.close()
+
+
+async def run_load(port, path, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            try:
+                status = await fetch(port, path)
+            except OSError:
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - started_at)
+            else:
+                errors += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started_at
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--path", default="/api/items/")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{'stack':>6} {'concurrency':>12} {'req/s':>9} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7}"
+    )
+    for label, async_db in (("sync", "false"), ("async", "true")):
+        port = free_port()
+        env = {
+            **os.environ,
+            "ASYNC_DB": async_db,
+            "ADMISSION_ENABLED": "false",
+            "CACHE_TTL_SECONDS": "0",
+            "LOG_LEVEL": "ERROR",
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-c", SERVER_SCRIPT, str(port)],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_server(port)
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = asyncio.run(
+                    run_load(port, args.path, concurrency, args.duration)
+                )
+                if not latencies:
+                    print(f"{label:>6} {concurrency:>12} no successful requests")
+                    continue
+                print(
+                    f"{label:>6} {concurrency:>12} {len(latencies) / elapsed:>9.1f} "
+                    f"{statistics.median(latencies) * 1000:>8.1f} "
+                    f"{percentile(latencies, 0.99) * 1000:>8.1f} {errors:>7}"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Per-call cost of LoggerService caller resolution at realistic stack depths.
+
+"before" is the inspect.stack() loop LoggerService.log used to run, "after"
+is find_caller_function. Both are called the way APIError does it, through
+APIException.__init__ -> logger.error -> logger.log. A full LoggerService.log
+call outside a request is measured too, with output sent to a NullHandler.
+
+Run from the project root with the server environment (.env) in place:
+
+    python -m benchmarks.logger_caller --depths 10 30 60
+"""
+
+import argparse
+import inspect
+import logging
+import time
+
+from app.services.logger_service import (
+    LOGGER_FUNCTIONS,
+    LoggerService,
+    find_caller_function,
+)
+
+
+def legacy_find_caller_function():
+    func = inspect.stack()[1].function
+    curr_stack_idx = 1
+    while func in LOGGER_FUNCTIONS:
+        curr_stack_idx += 1
+        func = inspect.stack()[curr_stack_idx].function
+    return func
+
+
+def at_depth(depth, func):
+    # Calls func from `depth` extra frames, like a handler deep in Flask
+    if depth <= 0:
+        return func()
+    return at_depth(depth - 1, func)
+
+
+def make_call_chain(resolve):
+    # Mirrors APIException.__init__ -> LoggerService.error -> LoggerService.log
+    def log():
+        return resolve()
+
+    def error():
+        return log()
+
+    def __init__():
+        return error()
+
+    def view():
+        return __init__()
+
+    return view
+
+
+def measure(depth, func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        at_depth(depth, func)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    logger = LoggerService()
+    handlers = logger.logger.handlers[:]
+    logger.logger.handlers = [logging.NullHandler()]
+
+    before = make_call_chain(legacy_find_caller_function)
+    after = make_call_chain(find_caller_function)
+
+    def full_log():
+        logger.error("benchmark")
+
+    assert at_depth(5, before) == at_depth(5, after) == "view"
+
+    try:
+        print(
+            f"{'depth':>6} {'before us/call':>15} {'after us/call':>14} "
+            f"{'speedup':>8} {'full log us/call':>17}"
+        )
+        for depth in args.depths:
+            before_us = measure(depth, before, args.iterations)
+            after_us = measure(depth, after, args.iterations)
+            full_us = measure(depth, full_log, args.iterations)
+            print(
+                f"{depth:>6} {before_us:>15.1f} {after_us:>14.2f} "
+                f"{before_us / after_us:>7.0f}x {full_us:>17.2f}"
+            )
+    finally:
+        logger.logger.handlers = handlers
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold start cost of the API process: importing the app package and running
+create_app(), each in a fresh interpreter.
+
+Reports the median wall time per phase, whether selenium ended up imported,
+and the slowest third-party packages according to `python -X importtime`.
+Compares the default mode (crawler loaded lazily) with API_ONLY.
+
+Run from the project root with the server environment (.env) in place:
+
+    python -m benchmarks.startup_time --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD_SCRIPT = """
+import json, sys, time
+started_at = time.perf_counter()
+import app
+imported_at = time.perf_counter()
+app.create_app()
+created_at = time.perf_counter()
+print(json.dumps({
+    "import": imported_at - started_at,
+    "create_app": created_at - imported_at,
+    "selenium_loaded": "selenium" in sys.modules,
+}))
+"""
+
+
+def run_child(env, importtime=False):
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c"]
+    result = subprocess.run(
+        [*command, CHILD_SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The app prints its banner before the measurements
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_packages(importtime_output, top):
+    # Lines look like "import time:  self [us] | cumulative | imported package",
+    # a package costs as much as its slowest cumulative entry
+    packages = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+    packages.pop("app", None)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    for label, api_only in (("default", "false"), ("API_ONLY", "true")):
+        env = {**os.environ, "API_ONLY": api_only}
+        samples = [run_child(env)[0] for _ in range(args.runs)]
+        _, importtime_output = run_child(env, importtime=True)
+
+        print(f"{label}:")
+        for phase in ("import", "create_app"):
+            median_ms = statistics.median(s[phase] for s in samples) * 1000
+            print(f"  {phase:<12} {median_ms:8.1f} ms (median of {args.runs})")
+        print(f"  selenium loaded: {samples[0]['selenium_loaded']}")
+        print("  slowest packages (cumulative import time):")
+        for package, cumulative_us in slowest_packages(importtime_output, args.top):
+            print(f"    {cumulative_us / 1000:8.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
+import asyncio
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import NullPool
 
 DATABASE_URL = "sqlite:///db/app.db"  # Update this path as needed
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///db/app.db"
 
 
 class Database:
@@ -19,6 +24,9 @@ class Database:
         return cls._instance
 
     def __init__(self):
+        if hasattr(self, "engine"):  # Avoid recreating the engine and Base
+            return
+
         self.engine = create_engine(
             DATABASE_URL,
             connect_args={"check_same_thread": False},  # Necessary for SQLite
@@ -36,3 +44,51 @@ class Database:
             yield db
         finally:
             db.close()
+
+
+class AsyncDatabase:
+    """
+    asyncio engine on the same database, used by the async read services.
+    Flask runs every async view in its own event loop, connections can not
+    outlive it so they are not pooled.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if not cls._instance:
+            with cls._lock:
+                if not cls._instance:
+                    cls._instance = super().__new__(cls)
+                    cls._instance.__init__()
+        return cls._instance
+
+    def __init__(self):
+        if hasattr(self, "engine"):  # Avoid recreating the engine
+            return
+
+        self.engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+        self._session_local = async_sessionmaker(
+            bind=self.engine, autoflush=False, expire_on_commit=False
+        )
+        self._connected = False
+        self._connect_lock = threading.Lock()
+
+    @property
+    def session_local(self):
+        # The engine initializes its dialect under an asyncio lock on the first
+        # connect, first connects from the loops of two requests at once fail.
+        # It is done once on first use, in a loop of its own since the caller
+        # is usually running in one already.
+        if not self._connected:
+            with self._connect_lock:
+                if not self._connected:
+                    with ThreadPoolExecutor(max_workers=1) as executor:
+                        executor.submit(asyncio.run, self._first_connect()).result()
+                    self._connected = True
+        return self._session_local
+
+    async def _first_connect(self):
+        async with self.engine.connect():
+            pass
@@ -0,0 +1,91 @@
+"""cluster finance history by finance and time
+
+Revision ID: 5b9e1d4f7a20
+Revises: f2a6c3e8d417
+Create Date: 2026-10-19 23:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b9e1d4f7a20"
+down_revision: Union[str, None] = "f2a6c3e8d417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite TIMESTAMP text to integer epoch milliseconds and back
+TO_EPOCH_MS = "CAST(ROUND((julianday({0}) - 2440587.5) * 86400000) AS INTEGER)"
+FROM_EPOCH_MS = (
+    "strftime('%Y-%m-%d %H:%M:%S', {0} / 1000, 'unixepoch')"
+    " || printf('.%06d', {0} % 1000 * 1000)"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "finance_history_clustered",
+        sa.Column(
+            "finance_id",
+            sa.Integer,
+            sa.ForeignKey("finances.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("ts_epoch_ms", sa.Integer, primary_key=True),
+        sa.Column("current_price", sa.Float, nullable=False),
+        sa.Column("last_seen_epoch_ms", sa.Integer, nullable=True),
+        sqlite_with_rowid=False,
+    )
+    # Rows of a finance within the same millisecond collapse into the last one
+    op.execute(
+        "INSERT OR REPLACE INTO finance_history_clustered "
+        "(finance_id, ts_epoch_ms, current_price, last_seen_epoch_ms) "
+        f"SELECT finance_id, {TO_EPOCH_MS.format('created_at')}, current_price, "
+        f"{TO_EPOCH_MS.format('last_seen_at')} FROM finance_history ORDER BY id"
+    )
+    op.drop_index("ix_finance_history_last_seen_at", table_name="finance_history")
+    op.drop_table("finance_history")
+    op.rename_table("finance_history_clustered", "finance_history")
+    op.create_index(
+        "ix_finance_history_last_seen_epoch_ms",
+        "finance_history",
+        ["last_seen_epoch_ms"],
+        sqlite_where=sa.text("last_seen_epoch_ms IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.create_table(
+        "finance_history_rowid",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "finance_id",
+            sa.Integer,
+            sa.ForeignKey("finances.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("current_price", sa.Float, nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP, nullable=False),
+        sa.Column("last_seen_at", sa.TIMESTAMP, nullable=True),
+    )
+    op.execute(
+        "INSERT INTO finance_history_rowid "
+        "(finance_id, current_price, created_at, last_seen_at) "
+        f"SELECT finance_id, current_price, {FROM_EPOCH_MS.format('ts_epoch_ms')}, "
+        "CASE WHEN last_seen_epoch_ms IS NOT NULL THEN "
+        f"{FROM_EPOCH_MS.format('last_seen_epoch_ms')} END "
+        "FROM finance_history ORDER BY ts_epoch_ms, finance_id"
+    )
+    op.drop_index("ix_finance_history_last_seen_epoch_ms", table_name="finance_history")
+    op.drop_table("finance_history")
+    op.rename_table("finance_history_rowid", "finance_history")
+    op.create_index(
+        "ix_finance_history_last_seen_at",
+        "finance_history",
+        ["last_seen_at"],
+        sqlite_where=sa.text("last_seen_at IS NOT NULL"),
+    )
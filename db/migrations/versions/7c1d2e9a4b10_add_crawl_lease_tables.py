@@ -0,0 +1,73 @@
+"""add crawl lease tables
+
+Revision ID: 7c1d2e9a4b10
+Revises: 292eb32b8191
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c1d2e9a4b10"
+down_revision: Union[str, None] = "292eb32b8191"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create the 'crawls' table, one row per planned crawl
+    op.create_table(
+        "crawls",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("request_id", sa.String(128), nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP, nullable=False),
+        sa.Column("completed_at", sa.TIMESTAMP, nullable=True),
+    )
+    op.create_index(
+        "ix_crawls_single_running",
+        "crawls",
+        ["status"],
+        unique=True,
+        sqlite_where=sa.text("status = 'running'"),
+    )
+
+    # Create the 'crawl_batches' table, the units of work nodes lease
+    op.create_table(
+        "crawl_batches",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "crawl_id",
+            sa.Integer,
+            sa.ForeignKey("crawls.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("symbols", sa.Text, nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("lease_owner", sa.String(100), nullable=True),
+        sa.Column("lease_expires_at", sa.TIMESTAMP, nullable=True),
+        sa.Column("heartbeat_at", sa.TIMESTAMP, nullable=True),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("created_at", sa.TIMESTAMP, nullable=False),
+        sa.Column("completed_at", sa.TIMESTAMP, nullable=True),
+    )
+    op.create_index(
+        "ix_crawl_batches_status",
+        "crawl_batches",
+        ["status", "lease_expires_at"],
+    )
+
+
+def downgrade() -> None:
+    # Drop the 'crawl_batches' table
+    op.drop_index("ix_crawl_batches_status", table_name="crawl_batches")
+    op.drop_table("crawl_batches")
+
+    # Drop the 'crawls' table
+    op.drop_index("ix_crawls_single_running", table_name="crawls")
+    op.drop_table("crawls")
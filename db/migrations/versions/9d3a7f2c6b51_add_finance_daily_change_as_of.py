@@ -0,0 +1,31 @@
+"""add finance daily change as of
+
+Revision ID: 9d3a7f2c6b51
+Revises: 5b9e1d4f7a20
+Create Date: 2026-10-20 00:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d3a7f2c6b51"
+down_revision: Union[str, None] = "5b9e1d4f7a20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Epoch milliseconds, like finance_history.ts_epoch_ms
+    op.add_column(
+        "finances", sa.Column("daily_change_as_of", sa.Integer, nullable=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("finances") as batch_op:
+        batch_op.drop_column("daily_change_as_of")
@@ -0,0 +1,87 @@
+"""replace crawl batches with tasks
+
+Revision ID: a3f5c8d21e67
+Revises: 7c1d2e9a4b10
+Create Date: 2026-10-19 19:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3f5c8d21e67"
+down_revision: Union[str, None] = "7c1d2e9a4b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create the 'crawl_tasks' table, one row per symbol of a crawl
+    op.create_table(
+        "crawl_tasks",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "crawl_id",
+            sa.Integer,
+            sa.ForeignKey("crawls.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("symbol", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("visible_at", sa.TIMESTAMP, nullable=False),
+        sa.Column("lease_owner", sa.String(100), nullable=True),
+        sa.Column("heartbeat_at", sa.TIMESTAMP, nullable=True),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text, nullable=True),
+        sa.Column("created_at", sa.TIMESTAMP, nullable=False),
+        sa.Column("completed_at", sa.TIMESTAMP, nullable=True),
+        sa.UniqueConstraint("crawl_id", "symbol"),
+    )
+    op.create_index(
+        "ix_crawl_tasks_status_visible_at",
+        "crawl_tasks",
+        ["status", "visible_at"],
+    )
+    op.create_index("ix_crawl_tasks_lease_owner", "crawl_tasks", ["lease_owner"])
+
+    # Batches only lived as long as a crawl, running crawls can not be resumed
+    op.execute("UPDATE crawls SET status = 'completed' WHERE status = 'running'")
+    op.drop_index("ix_crawl_batches_status", table_name="crawl_batches")
+    op.drop_table("crawl_batches")
+
+
+def downgrade() -> None:
+    # Recreate the 'crawl_batches' table
+    op.create_table(
+        "crawl_batches",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column(
+            "crawl_id",
+            sa.Integer,
+            sa.ForeignKey("crawls.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("symbols", sa.Text, nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("lease_owner", sa.String(100), nullable=True),
+        sa.Column("lease_expires_at", sa.TIMESTAMP, nullable=True),
+        sa.Column("heartbeat_at", sa.TIMESTAMP, nullable=True),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("created_at", sa.TIMESTAMP, nullable=False),
+        sa.Column("completed_at", sa.TIMESTAMP, nullable=True),
+    )
+    op.create_index(
+        "ix_crawl_batches_status",
+        "crawl_batches",
+        ["status", "lease_expires_at"],
+    )
+
+    # Drop the 'crawl_tasks' table
+    op.execute("UPDATE crawls SET status = 'completed' WHERE status = 'running'")
+    op.drop_index("ix_crawl_tasks_lease_owner", table_name="crawl_tasks")
+    op.drop_index("ix_crawl_tasks_status_visible_at", table_name="crawl_tasks")
+    op.drop_table("crawl_tasks")
@@ -0,0 +1,47 @@
+"""add finance crawl schedule
+
+Revision ID: c8e2b7f4a913
+Revises: a3f5c8d21e67
+Create Date: 2026-10-19 20:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c8e2b7f4a913"
+down_revision: Union[str, None] = "a3f5c8d21e67"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per symbol crawl interval and the time it is due next
+    op.add_column(
+        "finances", sa.Column("crawl_interval_seconds", sa.Integer, nullable=True)
+    )
+    op.add_column("finances", sa.Column("next_crawl_at", sa.TIMESTAMP, nullable=True))
+    op.create_index(
+        "ix_finances_tracking_next_crawl_at",
+        "finances",
+        ["is_tracking", "next_crawl_at"],
+    )
+
+    # Scheduled tasks do not belong to a crawl, SQLite needs the table rebuilt
+    with op.batch_alter_table("crawl_tasks") as batch_op:
+        batch_op.alter_column("crawl_id", existing_type=sa.Integer, nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM crawl_tasks WHERE crawl_id IS NULL")
+    with op.batch_alter_table("crawl_tasks") as batch_op:
+        batch_op.alter_column("crawl_id", existing_type=sa.Integer, nullable=False)
+
+    op.drop_index("ix_finances_tracking_next_crawl_at", table_name="finances")
+    with op.batch_alter_table("finances") as batch_op:
+        batch_op.drop_column("next_crawl_at")
+        batch_op.drop_column("crawl_interval_seconds")
@@ -0,0 +1,34 @@
+"""add crawl task timings
+
+Revision ID: e41b9d7c2a58
+Revises: c8e2b7f4a913
+Create Date: 2026-10-19 21:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e41b9d7c2a58"
+down_revision: Union[str, None] = "c8e2b7f4a913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PHASES = ("queue_wait", "driver", "navigation", "element_wait", "parse", "persist")
+
+
+def upgrade() -> None:
+    for phase in PHASES:
+        op.add_column(
+            "crawl_tasks", sa.Column(f"{phase}_seconds", sa.Float, nullable=True)
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("crawl_tasks") as batch_op:
+        for phase in reversed(PHASES):
+            batch_op.drop_column(f"{phase}_seconds")
@@ -0,0 +1,44 @@
+"""add finance history last seen at
+
+Revision ID: f2a6c3e8d417
+Revises: e41b9d7c2a58
+Create Date: 2026-10-19 22:15:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a6c3e8d417"
+down_revision: Union[str, None] = "e41b9d7c2a58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "finance_history", sa.Column("last_seen_at", sa.TIMESTAMP, nullable=True)
+    )
+    # Only rows extended by CRAWL_DEDUP are indexed
+    op.create_index(
+        "ix_finance_history_last_seen_at",
+        "finance_history",
+        ["last_seen_at"],
+        sqlite_where=sa.text("last_seen_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    # Expands the extended rows back into one row per point
+    op.execute(
+        "INSERT INTO finance_history (finance_id, current_price, created_at) "
+        "SELECT finance_id, current_price, last_seen_at FROM finance_history "
+        "WHERE last_seen_at IS NOT NULL"
+    )
+    op.drop_index("ix_finance_history_last_seen_at", table_name="finance_history")
+    with op.batch_alter_table("finance_history") as batch_op:
+        batch_op.drop_column("last_seen_at")
@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+
+from app import create_app
+from app.api.finances import finance_controller
+from app.services.admission_service import AdmissionController
+
+EXPORT_ENDPOINT = "api.finance.export_finance_history_ndjson"
+SLOW_EXPORT_URL = "/api/finances/SLOW/history.ndjson"
+EXPORT_URL = "/api/finances/AAPL/history.ndjson"
+
+
+def history_batches(exporting, finish, batches=3):
+    # Rows of SLOW come in until finish is set, every other symbol is
+    # answered at once
+    def get_finance_history_batches(symbol, from_ts=None, to_ts=None, **_kwargs):
+        def generate():
+            for index in range(batches):
+                if symbol == "SLOW" and index == 1:
+                    exporting.set()
+                    finish.wait(5)
+                yield [(1.0, datetime(2024, 1, 1, tzinfo=timezone.utc))]
+
+        return generate()
+
+    return get_finance_history_batches
+
+
+class StreamedExportAdmissionTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        self.controller = AdmissionController()
+        self.saved = {
+            name: getattr(self.controller, name)
+            for name in (
+                "enabled",
+                "max_concurrency",
+                "queue_timeout_seconds",
+                "latency_target_ms",
+                "rate_per_second",
+                "_routes",
+            )
+        }
+        self.controller.enabled = True
+        self.controller.queue_timeout_seconds = 0.05
+        self.controller.latency_target_ms = 50
+        self.controller.rate_per_second = 0
+        self.controller._routes = {}
+
+        service = finance_controller.finance_service
+        self.saved_batches = service.get_finance_history_batches
+        self.exporting = threading.Event()
+        self.finish = threading.Event()
+        service.get_finance_history_batches = history_batches(
+            self.exporting, self.finish
+        )
+        self.exports = []
+
+    def tearDown(self):
+        self.finish.set()
+        for name, value in self.saved.items():
+            setattr(self.controller, name, value)
+        finance_controller.finance_service.get_finance_history_batches = (
+            self.saved_batches
+        )
+
+    def _start_slow_export(self):
+        def export():
+            response = self.app.test_client().get(SLOW_EXPORT_URL)
+            self.exports.append(
+                (response.status_code, len(response.data.splitlines()))
+            )
+
+        self.exporting.clear()
+        exporter = threading.Thread(target=export)
+        exporter.start()
+        self.assertTrue(self.exporting.wait(5))
+        return exporter
+
+    def _finish_slow_export(self, exporter):
+        # Streams long past the latency target before its last rows
+        time.sleep(0.5)
+        self.finish.set()
+        exporter.join()
+
+    def test_streaming_export_holds_its_slot(self):
+        self.controller.max_concurrency = 1
+        exporter = self._start_slow_export()
+        route = self.controller._routes[EXPORT_ENDPOINT]
+        self.assertEqual(route.in_flight, 1)
+
+        response = self.app.test_client().get(SLOW_EXPORT_URL)
+        self.assertIn(response.status_code, (429, 503))
+        self.assertIn("Retry-After", response.headers)
+
+        self._finish_slow_export(exporter)
+        self.assertEqual(self.exports, [(200, 3)])
+        self.assertEqual(route.in_flight, 0)
+
+    def test_streaming_time_is_not_latency(self):
+        self.controller.max_concurrency = 2
+        for _ in range(2):
+            exporter = self._start_slow_export()
+            route = self.controller._routes[EXPORT_ENDPOINT]
+            # One slot left, taken in turn by normal exports of the route
+            for _ in range(3):
+                response = self.app.test_client().get(EXPORT_URL)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data.splitlines()), 3)
+            self._finish_slow_export(exporter)
+            self.finish.clear()
+
+        self.assertEqual(self.exports, [(200, 3), (200, 3)])
+        self.assertLess(route.latency_ms, self.controller.latency_target_ms)
+
+
+if __name__ == "__main__":
+    unittest.main()
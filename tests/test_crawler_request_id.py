@@ -0,0 +1,96 @@
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import create_app
+from app.api.finances import finance_controller, finance_service
+from app.api.finances.crawl_model import Crawl
+from app.crawler import crawl_worker
+from app.services.crawl_coordinator_service import CrawlCoordinator
+from app.services.logger_service import request_id_var
+
+REQUEST_ID = "crawl-request-42"
+
+
+class _FailingBrowser:
+    def fetch_stock_price(self, symbol, retries=3, timings=None):
+        raise RuntimeError("Browser crashed")
+
+    def close(self):
+        pass
+
+
+class _RecordCollector(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class CrawlerRequestIdTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+
+    def setUp(self):
+        # Crawl queue in a database of its own
+        self.directory = tempfile.TemporaryDirectory()
+        engine = create_engine(
+            f"sqlite:///{os.path.join(self.directory.name, 'crawl.db')}"
+        )
+        Crawl.metadata.create_all(engine)
+        self.engine = engine
+        self.coordinator = CrawlCoordinator(sessionmaker(bind=engine))
+
+        self.saved_coordinator = finance_service.crawl_coordinator
+        finance_service.crawl_coordinator = self.coordinator
+        service = finance_controller.finance_service
+        self.saved_symbols = service.get_all_finances_symbols
+        service.get_all_finances_symbols = lambda: [
+            {"symbol": "AAPL:NASDAQ", "is_tracking": True}
+        ]
+
+        # Records are collected in place of the crawler's log files
+        self.logger = crawl_worker.crawler_logger.logger
+        self.saved_handlers = self.logger.handlers[:]
+        self.collector = _RecordCollector()
+        self.logger.handlers = [self.collector]
+
+    def tearDown(self):
+        self.logger.handlers = self.saved_handlers
+        finance_service.crawl_coordinator = self.saved_coordinator
+        finance_controller.finance_service.get_all_finances_symbols = (
+            self.saved_symbols
+        )
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_crawler_logs_carry_the_enqueuing_request_id(self):
+        response = self.app.test_client().post(
+            "/api/finances/crawl", headers={"X-Request-ID": REQUEST_ID}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        worker = crawl_worker.CrawlWorker(concurrency=1)
+        worker.coordinator = self.coordinator
+        tasks = self.coordinator.claim_tasks()
+        self.assertEqual([task["request_id"] for task in tasks], [REQUEST_ID])
+        for task in tasks:
+            worker._run_task(_FailingBrowser(), task, time.perf_counter())
+
+        self.assertTrue(self.collector.records)
+        self.assertEqual(
+            {record.request_id for record in self.collector.records}, {REQUEST_ID}
+        )
+        self.assertIsNone(request_id_var.get())
+
+
+if __name__ == "__main__":
+    unittest.main()